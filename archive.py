@@ -0,0 +1,135 @@
+###### archive.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for the archive of evaluated solutions : skip evaluating a solution evaluated before
+# The instance wraps "fnc" in runner.py
+
+
+# import libraries and other files
+import os
+import numpy            as np
+try:
+    import fcntl                                # lock of the saved archive (POSIX only)
+except ImportError:
+    fcntl = None
+from   function         import Function
+
+
+class EvaluationArchive(Function):
+
+    """ constructor """
+    # initialize method : wrap "fnc" ; results are loaded from / saved to "path" (None : not persistent)
+    def __init__(self, fnc, tol:float=0., path:str=None):
+
+        """ instance variable """
+        super().__init__(fnc.prob_dim, fnc.prob_name)
+        self.fnc            = fnc               # wrapped function (or evaluator) instance
+        self.tol            = tol               # solutions within "tol" of an archived one reuse its fitness (0 : exact only)
+        self.path           = path
+        self.axis_range     = fnc.axis_range
+        self.evaluate       = fnc.evaluate
+        if hasattr(fnc, "init_range"):
+            self.init_range = fnc.init_range
+
+        self.cache          = {}                # {bytes of x: f(x)}    : exact-match hash cache
+        self.size           = 0                 # the number of archived solutions
+        self.x              = np.zeros((1024, fnc.prob_dim))    # archived solutions x[:size] (rows of the KD-tree)
+        self.y              = np.zeros(1024)                    # their fitness
+        self.tree           = None              # KD-tree of "x" : made again when "x" grows
+        self.hits           = 0                 # the number of solutions not evaluated (not counted in FEs)
+        if self.path is not None and os.path.isfile(self.path):
+            self._append(*self._load())
+
+
+    """ instance method """
+    # evaluate : only solutions not in the archive are passed to "fnc" (FEs count only them)
+    def doEvaluate(self, x):
+        x = np.asarray(x, dtype=float)
+        if len(x.shape) == 1:
+            return self.doEvaluate(x[None])[0]
+        ret  = np.zeros(x.shape[0])
+        _key = [self._key(x[i]) for i in range(x.shape[0])]
+        _hit = np.array([k in self.cache for k in _key])
+        for i in np.flatnonzero(_hit):
+            ret[i] = self.cache[_key[i]]
+        if self.tol > 0 and self.size > 0 and not _hit.all():  # near hits : rows within "tol"
+            _row = np.flatnonzero(~_hit)
+            _d, _, _y = self.nearest(x[_row])
+            ret[_row[_d <= self.tol]] = _y[_d <= self.tol]
+            _hit[_row[_d <= self.tol]] = True
+
+        _new = {}                               # {key: row} of solutions to be evaluated (once per batch)
+        for i in np.flatnonzero(~_hit):
+            _new.setdefault(_key[i], i)
+        self.hits += x.shape[0] - len(_new)
+        if len(_new) > 0:
+            _row = np.array(list(_new.values()))
+            self.countEvals(len(_row))
+            self._append(x[_row], np.asarray(self.fnc.doEvaluate(x[_row])))
+            for i in np.flatnonzero(~_hit):
+                ret[i] = self.cache[_key[i]]
+        return ret
+
+    # fitness of archived solutions nearest to "x" : k rows of (distance, x, f(x))
+    def nearest(self, x, k:int=1):
+        from scipy.spatial import cKDTree                   # scipy is imported only when the KD-tree is used
+        if self.tree is None or self.tree.n != self.size:
+            self.tree = cKDTree(self.x[:self.size])
+        _d, _i = self.tree.query(np.asarray(x, dtype=float), k=k)
+        return _d, self.x[_i], self.y[_i]
+
+    # hit rate : the ratio of solutions not evaluated
+    def hitRate(self):
+        return self.hits / max(1, self.hits + self.total_evals)
+
+    # state for a checkpoint : archived solutions, hits and the FEs counted by the wrapped evaluator
+    def getState(self):
+        return self.x[:self.size].copy(), self.y[:self.size].copy(), self.hits, self.fnc.total_evals
+
+    def setState(self, state):
+        _x, _y, self.hits, self.fnc.total_evals = state
+        self.cache, self.size, self.tree = {}, 0, None
+        self._append(_x, _y)                    # the cache is made again from the solutions
+
+    # save the archive (merged with the saved one, since other trials may have saved it)
+    # trials saving at once merge one by one under a lock of "path.lock", so no entries are lost
+    def save(self):
+        if self.path is None:
+            return
+        with open(self.path + ".lock", "a") as _lock:
+            if fcntl is not None:
+                fcntl.flock(_lock, fcntl.LOCK_EX)   # released when closed
+            _x, _y = self.x[:self.size], self.y[:self.size]
+            if os.path.isfile(self.path):
+                _ox, _oy = self._load()
+                _x, _y = np.concatenate([_ox, _x]), np.concatenate([_oy, _y])
+                _x, _idx = np.unique(_x, axis=0, return_index=True)
+                _y = _y[_idx]
+            _tmp = self.path + ".{}.tmp.npz".format(os.getpid())
+            np.savez(_tmp, x=_x, y=_y)
+            os.replace(_tmp, self.path)             # atomic : never a broken archive
+
+    # save the archive and release the wrapped evaluator
+    def close(self):
+        self.save()
+        if hasattr(self.fnc, "close"):
+            self.fnc.close()
+
+    # hash key of a solution (-0.0 and 0.0 are the same key)
+    def _key(self, x):
+        return (np.ascontiguousarray(x) + 0.).tobytes()
+
+    # add solutions to the archive (the capacity is doubled when full)
+    def _append(self, x, y):
+        for i in range(len(x)):
+            self.cache[self._key(x[i])] = y[i]
+        while self.size + len(x) > len(self.x):
+            self.x = np.concatenate([self.x, np.zeros_like(self.x)])
+            self.y = np.concatenate([self.y, np.zeros_like(self.y)])
+        self.x[self.size:self.size+len(x)], self.y[self.size:self.size+len(x)] = x, y
+        self.size += len(x)
+
+    # load the saved archive
+    def _load(self):
+        with np.load(self.path) as dat:
+            return dat["x"], dat["y"]
@@ -0,0 +1,175 @@
+###### benchmark.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for measuring the throughput of EBADE itself (not of the objective)
+# "python benchmark.py --save base.json" stores a baseline, "python benchmark.py --compare base.json" checks regressions
+
+
+# import libraries and other files
+import os, io, sys, time, json, shutil, platform, tempfile, argparse, subprocess, contextlib
+import numpy            as np
+import configuration    as cf
+import ebade            as eb
+import function         as fc
+import logger           as lg
+
+
+# cases : (D, M, N, K) ; the default setting of EBADE is (*, 25, 4, 6)
+DIMS    = [10, 20, 30, 100]
+SHAPES  = [(25, 4, 6), (10, 4, 6), (50, 4, 6), (25, 8, 6), (25, 4, 12)]
+MODES   = {"legacy": dict(do_batch=False, do_batch_emul=False),
+           "batch":  dict(do_batch=True,  do_batch_emul=True)}
+
+
+class ZeroCost(fc.Function):
+
+    """ constructor """
+    # initialize method : f(x) = 1 + |x_1| costs (almost) nothing, so only the optimizer is measured
+    def __init__(self, prob_dim:int):
+        super().__init__(prob_dim, "ZeroCost")
+        self.axis_range = [np.full(self.prob_dim, -100.), np.full(self.prob_dim, 100.)]
+        self.evaluate   = lambda x: 1. + np.abs(x[..., 0])
+
+
+    """ instance method """
+    # evaluate all rows in one call
+    def doEvaluate(self, x):
+        x = np.asarray(x, dtype=float)
+        self.countEvals(1 if len(x.shape) == 1 else x.shape[0])
+        return self.evaluate(x)
+
+
+# run "gens" generations of one case and measure the validations with the profiler
+def runCase(dim, M, N, K, mode, gens, path_out, seed=1):
+    cnf = cf.Configuration()
+    cnf.prob_dim, cnf.path_out = dim, path_out
+    cnf.subpopulations, cnf.pop_size, cnf.analyte = M, N, K
+    cnf.max_gen, cnf.do_profile = gens + 1, True
+    for key, val in MODES[mode].items():
+        setattr(cnf, key, val)
+    fnc = ZeroCost(dim)
+    log = lg.Logger(cnf, fnc, fnc.prob_name)
+    cnf.setRandomSeed(seed)
+    ead = eb.EmulationBasedAdaptiveDifferentialEvolution(cnf, fnc, log)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):   # without the result of the trial
+        ead.run(0)
+    total = time.perf_counter() - start
+    phase = ead.prof.summary()
+    time_valid = phase.get("posthoc", [0., 0])[0] + phase.get("prior", [0., 0])[0]     # no validation if gens = 1
+    return {
+        "gens_per_sec"      : gens / total,
+        "emuls_per_sec"     : ead.emuls / time_valid if time_valid > 0 else 0.,
+        "overhead_per_eval" : total / fnc.total_evals,
+        "evals"             : fnc.total_evals,
+        "fx"                : float(ead.bf),        # must not change by a speed-up
+    }
+
+
+# seconds to start a fresh interpreter ("python") and one importing what a worker process imports ("runner")
+def runStartup(repeat=5):
+    ret = {}
+    for name, code in [("python", "pass"), ("runner", "import runner")]:
+        _t = []
+        for r in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+            _t.append(time.perf_counter() - start)
+        ret[name] = min(_t)
+    ret["import"] = ret["runner"] - ret["python"]
+    print("startup\t\tpython: {:.3f} s\trunner: {:.3f} s\timport: {:.3f} s".format(ret["python"], ret["runner"], ret["import"]))
+    return ret
+
+
+# metadata of the environment the benchmark ran in
+def getEnvironment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python"    : platform.python_version(),
+        "numpy"     : np.__version__,
+        "platform"  : platform.platform(),
+        "processor" : platform.processor() or platform.machine(),
+        "cpu_count" : os.cpu_count(),
+        "commit"    : commit,
+        "date"      : time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+# run all cases : the best of "repeat" runs is kept to reduce noise
+def runBenchmark(dims=DIMS, shapes=SHAPES, modes=MODES, gens=20, repeat=3):
+    path_out = tempfile.mkdtemp(prefix="ebade_bench_")
+    ret = {"environment": getEnvironment(), "gens": gens, "repeat": repeat, "cases": {}}
+    try:
+        for mode in modes:
+            for dim in dims:
+                for M, N, K in shapes:
+                    key = "{}/D{}/M{}/N{}/K{}".format(mode, dim, M, N, K)
+                    runs = [runCase(dim, M, N, K, mode, gens, path_out) for r in range(repeat)]
+                    best = dict(runs[0])
+                    best["gens_per_sec"]        = max(r["gens_per_sec"] for r in runs)
+                    best["emuls_per_sec"]       = max(r["emuls_per_sec"] for r in runs)
+                    best["overhead_per_eval"]   = min(r["overhead_per_eval"] for r in runs)
+                    ret["cases"][key] = best
+                    print("{:28s}\t{:10.1f} gen/s\t{:10.1f} emul/s\t{:8.2f} us/eval".format(
+                          key, best["gens_per_sec"], best["emuls_per_sec"], best["overhead_per_eval"] * 1e6))
+    finally:
+        shutil.rmtree(path_out, ignore_errors=True)
+    return ret
+
+
+# compare with a baseline : return cases slower than "tol" (ratio) and cases whose results changed
+def compare(res, base, tol=0.1):
+    slower, changed = [], []
+    if "startup" in res and "startup" in base:
+        ratio = base["startup"]["runner"] / res["startup"]["runner"]
+        print("startup\t\tbase: {:.3f} s\tnow: {:.3f} s\tratio: {:.2f}{}".format(
+              base["startup"]["runner"], res["startup"]["runner"], ratio, "  SLOWER" if ratio < 1. - tol else ""))
+        if ratio < 1. - tol:
+            slower.append("startup")
+    print("{:28s}\t{:>10s}\t{:>10s}\t{:>7s}".format("case", "base gen/s", "gen/s", "ratio"))
+    for key, cur in res["cases"].items():
+        if key not in base["cases"]:
+            continue
+        old = base["cases"][key]
+        ratio = cur["gens_per_sec"] / old["gens_per_sec"]
+        mark = ""
+        if ratio < 1. - tol:
+            slower.append(key)
+            mark += "  SLOWER"
+        if cur["fx"] != old["fx"] or cur["evals"] != old["evals"]:
+            changed.append(key)
+            mark += "  RESULT CHANGED"
+        print("{:28s}\t{:10.1f}\t{:10.1f}\t{:7.2f}{}".format(key, old["gens_per_sec"], cur["gens_per_sec"], ratio, mark))
+    return slower, changed
+
+
+""" main """
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="throughput benchmark of EBADE with a zero-cost objective")
+    parser.add_argument("--save",    help="save the results as json")
+    parser.add_argument("--compare", help="json of a baseline to compare with")
+    parser.add_argument("--dims",    type=int, nargs="+", default=DIMS)
+    parser.add_argument("--modes",   nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--gens",    type=int, default=20)
+    parser.add_argument("--repeat",  type=int, default=3)
+    parser.add_argument("--startup", action="store_true", help="also measure the start time of a worker process")
+    parser.add_argument("--tol",     type=float, default=0.1, help="allowed slowdown ratio")
+    args = parser.parse_args()
+
+    res = runBenchmark(args.dims, SHAPES, args.modes, args.gens, args.repeat)
+    if args.startup:
+        res["startup"] = runStartup()
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(res, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            base = json.load(f)
+        slower, changed = compare(res, base, args.tol)
+        print("slower: {}\tresult changed: {}".format(len(slower), len(changed)))
+        sys.exit(1 if len(slower) + len(changed) > 0 else 0)
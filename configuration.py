@@ -6,8 +6,9 @@
 
 
 # import libraries and other files
-import os, shutil
+import os, shutil, importlib.util
 import numpy            as np
+from   randomstream     import RandomStream
 
 
 class Configuration:
@@ -19,14 +20,42 @@ class Configuration:
         """ instance variable """
         # Experimental setting
         self.do_console     = False             # whether print live score
+        self.log_format     = "csv"             # trial log : "csv" or "npy" (binary, streamed to disk; "python logger.py" exports csv)
+        self.log_flush      = 100               # the number of records kept in memory before written to disk ("npy")
+        self.log_x          = False             # whether log the best solution x of each generation
+        self.log_variants   = False             # whether log variants of each subpopulation of each generation ("npy")
         self.max_trial      = 21                # trial times
         self.max_evals      = 10000             # maximum number of fitness evaluation
+        self.do_batch       = False             # whether evolve all subpopulations as one (M*N, D) matrix
+        self.do_batch_emul  = False             # whether emulate all candidate configurations of all losers at once
+        self.max_workers    = 1                 # the number of worker processes running trials (1 : serial)
+        self.threads        = 1                 # the number of threads making trial solutions of subpopulations and tuning losers
+                                                # in a trial (1 : serial, >1 needs rng = "spawn" ; the batch engine runs in one thread)
+        self.procs          = 1                 # the number of worker processes making trial solutions and tuning losers in a trial
+                                                # on a population shared by a memory-mapped file (shared.py ; >1 : rng = "spawn", instead of "threads")
+        self.evaluator      = "serial"          # how a batch is evaluated : "serial", "thread", "process" or "async"
+        self.eval_workers   = 4                 # the number of solutions in flight at once (except "serial")
+        self.shared_pool    = False             # whether all trials run at once sharing "eval_workers" workers (scheduler.py)
+        self.sim_delay      = 0.                # seconds per evaluation of the stand-in simulator (0 : no simulator)
+        self.do_archive     = False             # whether skip evaluating solutions evaluated before (archive.py)
+        self.archive_tol    = 0.                # solutions within this distance reuse an archived fitness (0 : exact match)
+        self.archive_save   = False             # whether keep the archive of each problem on disk for restarts and other trials
+        self.checkpoint_gen = 0                 # save a checkpoint of a running trial every this generations (0 : never)
+        self.max_time       = 0.                # seconds of a trial before it stops (0 : no limit)
+        self.target_fx      = None              # a trial stops when f_best reaches this (None : never)
+        self.stall_gen      = 0                 # a trial stops when f_best has not improved by more than "stall_tol" for this number of generations (0 : never)
+        self.stall_tol      = 0.
+        self.diversity_tol  = 0.                # a trial stops when the standard deviation of the whole population per axis,
+                                                # averaged and relative to the domain, falls below this (0 : never)
+        self.rng            = "legacy"          # random streams : "legacy" (one RandomState : the sequence of the published results)
+                                                # or "spawn" (Generator : independent streams per subpopulation and emulation)
+        self.do_profile     = False             # whether record time of each phase to trial{seed}_profile.csv (profiler.py)
 
         # Problem setting
         self.prob_dim_list  = [10, 20, 30]      # dimension list
         self.prob_dim       = 0                 # dimension
 
-        self.prob_name      = [
+        self.prob_name      = [                 # names registered in function.PROBLEMS ("F1_SR"-"F7_SR" : shifted and rotated)
             # Unimodal
             "F1",                                   # Sphere Function
             # Multimodal
@@ -63,13 +92,62 @@ class Configuration:
             "exponential"                           # 1
             ]
 
+        # Surrogate setting
+        self.do_prescreen   = False             # whether pre-screen trial solutions with a surrogate model
+        self.prescreen_model= "knn"             # surrogate model : "knn" (k-nearest neighbour) or "rbf" (cubic RBF)
+        self.prescreen_cand = 4                 # the number of trial candidates per solution (only the best-predicted is evaluated)
+        self.prescreen_archive = 300            # the maximum number of evaluated solutions to train the model (newest kept)
+        self.prescreen_min  = 200               # the number of evaluated solutions needed before pre-screening starts
+        self.prescreen_neighbors = 5            # k of the k-nearest neighbour model
+
+        # Adaptive emulation setting (decisions are logged to trial{seed}_adapt.csv)
+        self.do_adapt       = False             # whether K of each generation is decided by the measured cost of emulation and evaluation
+        self.adapt_budget   = 1.                # time of the emulations of a generation relative to that of its evaluations
+        self.analyte_min    = 1                 # the range of adapted K
+        self.analyte_max    = 24
+        self.skip_won       = 0                 # losers which won within this number of generations keep their configurations (0 : tune all)
+
 
     """ instance method """
-    # set random seed of "numpy.random"
+    # set random seed : each configuration has its own stream of "numpy.random"
     def setRandomSeed(self, seed=0):
         self.seed = seed
-        self.rd = np.random
-        self.rd.seed(self.seed)
+        if self.rng == "spawn":
+            self.rd = RandomStream(np.random.SeedSequence(self.seed))
+        else:
+            self.rd = np.random.RandomState(self.seed)
+
+    # random stream identified by "key" : (0, sid) subpopulation, (1, gen, sid) emulation of a loser,
+    # (2, gen) trial solutions and (3, gen) emulations of the batch engine ("legacy" : all share "rd")
+    def stream(self, *key):
+        if self.rng == "spawn":
+            return self.rd.child(*key)
+        return self.rd
+
+    # check the environment once before trials (not in each worker process or function instance)
+    def checkEnvironment(self):
+        _ret = True
+        if tuple(int(v) for v in np.__version__.split(".")[:2]) < (1, 19):
+            print("Error: Numpy version >= 1.19 required. But {} now.".format(np.__version__))
+            _ret = False
+        if self.threads > 1 and self.rng != "spawn":
+            print("Error: threads > 1 requires rng = \"spawn\" (streams independent of the order of threads).")
+            _ret = False
+        if self.procs > 1 and (self.rng != "spawn" or self.do_batch or self.do_batch_emul or self.do_prescreen):
+            print("Error: procs > 1 requires rng = \"spawn\", and not do_batch, do_batch_emul or do_prescreen.")
+            _ret = False
+        if self.shared_pool and (self.do_archive or self.evaluator in ["thread", "async"]):
+            # the scheduler evaluates the solutions of all trials itself (threads, or processes with "process")
+            print("Error: shared_pool works without do_archive, and with evaluator = \"serial\" or \"process\".")
+            _ret = False
+        # optional libraries are imported only when a feature needs them
+        _need = {"pandas" : True,                                                       # statistics
+                 "scipy"  : self.do_archive or (self.do_prescreen and self.prescreen_model == "rbf")}
+        for name in _need:
+            if _need[name] and importlib.util.find_spec(name) is None:
+                print("Error: {} required. But not installed.".format(name))
+                _ret = False
+        return _ret
 
     # I/O setting
     def makeOutDirectory(self, dim):
@@ -7,20 +7,25 @@
 
 # import libraries and other files
 import numpy            as np
+from   profiler         import NullProfiler
 
 
 class DifferentialEvolution:
 
     """ constructor """
     # initialize method
-    def __init__(self, cnf, fnc, variants):
+    def __init__(self, cnf, fnc, variants, sid, sto, prof=None, rd=None):
         self.cnf        = cnf       # configuration instance
         self.fnc        = fnc       # function      
-        self.pop        = []        # Pi = {x_1 x_2 ... x_(pop_size}    : population set
-        self.fit        = []        # Fi = {f(x_1) f(x_2) ... f(x_ )}   : fitness set
-        self.grad       = []        # Gi = {g(x_1) g(x_2) ... g(x_ )}   : Fitness Improvement Rate (FIR) set
-
-        self.selector   = DEVariant(self.cnf, self.fnc)   # set mutation and crossover
+        self.prof       = prof if prof is not None else NullProfiler()      # profiler
+        self.sid        = sid       # subpopulation ID : pop[i] is the (sid * pop_size + i)-th row of the whole population
+        self.rd         = rd if rd is not None else cnf.stream(0, sid)     # random stream of the subpopulation
+        self.pop        = sto.pop[sto.rows(sid)]    # Pi = {x_1 x_2 ... x_(pop_size}    : population set
+        self.fit        = sto.fit[sto.rows(sid)]    # Fi = {f(x_1) f(x_2) ... f(x_ )}   : fitness set
+        self.grad       = sto.grad[sto.rows(sid)]   # Gi = {g(x_1) g(x_2) ... g(x_ )}   : Fitness Improvement Rate (FIR) set
+                                                    # (views of the whole population store "sto")
+
+        self.selector   = DEVariant(self.cnf, self.fnc, self.rd)  # set mutation and crossover
         self.setVariants(variants)
 
 
@@ -36,57 +41,73 @@ class DifferentialEvolution:
         self.crossover      = self.selector.crossover_map[self.v_CROSSOVER]
 
     # initialize solutions
-    def initializePopulation(self):
+    def initializePopulation(self, evaluate=True):
         for i in range(self.cnf.pop_size):
             # generate randomly
             if hasattr(self.fnc, "init_range"):
-                self.pop.append(self.cnf.rd.uniform(self.fnc.init_range[0], self.fnc.init_range[1]))
+                self.pop[i] = self.rd.uniform(self.fnc.init_range[0], self.fnc.init_range[1])
             else:
-                self.pop.append(self.cnf.rd.uniform(self.fnc.axis_range[0], self.fnc.axis_range[1]))
-            self.fit.append(self.fnc.doEvaluate(self.pop[i]))
-            self.grad.append(0)
-
-    # run DE
-    def run(self, ead_pop, ead_fit, b1):
-        self.pop, self.fit, self.grad  = self._generationShift(self.pop, self.fit, ead_pop, ead_fit, b1, self.grad)
-
-    # generational shift
-    def _generationShift(self, pop, fit, ead_pop, ead_fit, _b1, grd):
-        _pb1    = None  # x_p-best  = [x1 x2 ... xD]   : one of better solutions (top ~ subpopulations*pop_size*p_pbest)
-        if self.v_MUTATION in [2]: # CHANGE
-            _tmp, _max = np.argsort(ead_fit), (int)(max(2.0, self.cnf.subpopulations * self.cnf.pop_size * self.cnf.p_pbest))
-            _pb1 = ead_pop[self.cnf.rd.choice(_tmp[0:_max])]
-
-        _v      = []    # mutant solution
-        _u      = []    # crossovered solution
-        _e      = []    # the fitness of _u
-        for i in range(self.cnf.pop_size):
-            _v.append(self.mutation(self.F, ead_pop, _b1, pop[i], _pb1))    # mutation
-            _u.append(self.crossover(self.CR, pop[i], _v[i]))               # crossover
-            _e.append(self.fnc.doEvaluate(_u[i]))                           # evaluate _u
-
-        # selection
-        for i in range(self.cnf.pop_size):
-            grd[i] = (_e[i]-fit[i])/fit[i]
-            if _e[i] <= fit[i]:
-                pop[i], fit[i] = np.copy(_u[i]), _e[i]
-        return pop, fit, grd
+                self.pop[i] = self.rd.uniform(self.fnc.axis_range[0], self.fnc.axis_range[1])
+        self.grad[:] = 0
+        if evaluate:
+            self.fit[:] = self.fnc.doEvaluate(self.pop)                  # evaluate all at once
+
+    # generational shift (1/2) : make trial solutions, which are evaluated by the caller
+    # with a surrogate model "sur", only the best-predicted of "prescreen_cand" candidates per solution is returned
+    def makeTrials(self, snp, sur=None):
+        if sur is None or not sur.isReady():
+            return self._makeTrials(self.pop, snp)
+        _cand = np.array([self._makeTrials(self.pop, snp) for k in range(self.cnf.prescreen_cand)])
+        _t = self.prof.clock()
+        _u = sur.screen(_cand)
+        self.prof.add("prescreen", _t, self.sid)
+        return _u
+
+    # generational shift (2/2) : selection with the fitness _e of the trial solutions _u (in place)
+    def selectTrials(self, _u, _e):
+        _u, _e = np.asarray(_u), np.asarray(_e)
+        self.grad[:] = (_e-self.fit)/self.fit
+        _win = _e <= self.fit
+        self.pop[_win], self.fit[_win] = _u[_win], _e[_win]
 
     # at priorValidation component, make a set of next-generation solutions to test a candidate configuration
-    def testVariants(self, variants, pop, fit, ead_pop, ead_fit, _b1, target):
+    # "rd" : random stream of the emulation (None : that of the subpopulation)
+    def testVariants(self, variants, pop, fit, snp, target, rd=None):
         self.setVariants(variants)
+        if rd is None or rd is self.rd:
+            return self._makeTrials(pop, snp, "emulation/")
+        return self._makeTrials(pop, snp, "emulation/", DEVariant(self.cnf, self.fnc, rd))
+
+    # at priorValidation component, emulate "analyte" candidate configurations drawn from "rd"
+    # return the configuration whose pseudo next-generation solutions come nearest to "target"
+    def emulate(self, target, snp, analyte, rd):
+        _var = []   # [[F_1 CR_1 mut_1 xov_1] ... [_ _ _ _analyte]] : a set of temporary variants
+        _nrm = []   # [score_1 score_2 ... score_analyte]           : a set of scores
+        for i in range(analyte):
+            _var.append([rd.rand(), rd.rand(), rd.randint(len(self.cnf.mutation)), rd.randint(len(self.cnf.crossover))])
+            _pop = self.testVariants(_var[i], self.pop, self.fit, snp, target, rd)
+            _nrm.append(np.min(np.linalg.norm(np.array(_pop) - np.array(target), axis=1)))     # score : minimum norm to the target
+        return _var[np.argmin(_nrm)]
+
+    # mutation and crossover of "pop", whose rows are from the (sid * pop_size)-th row of snp.pop
+    # "tag" is the prefix of the profiled phases, "sel" draws random numbers from its stream (None : self.selector)
+    def _makeTrials(self, pop, snp, tag="", sel=None):
+        sel     = self.selector if sel is None else sel
+        _mutation, _crossover = sel.mutation_map[self.v_MUTATION], sel.crossover_map[self.v_CROSSOVER]
         _pb1    = None  # x_p-best  = [x1 x2 ... xD]   : one of better solutions (top ~ subpopulations*pop_size*p_pbest)
         if self.v_MUTATION in [2]: # CHANGE
-            _tmp, _max = np.argsort(ead_fit), (int)(max(2.0, self.cnf.subpopulations * self.cnf.pop_size * self.cnf.p_pbest))
-            _pb1 = ead_pop[self.cnf.rd.choice(_tmp[0:_max])]
+            _pb1 = snp.pop[sel.rd.choice(snp.pool)]
 
+        _i1     = self.sid * self.cnf.pop_size  # index of pop[0] in snp.pop
         _v      = []    # mutant solution
-        _ret    = []    # temporary _u
+        _u      = []    # crossovered solution
+        _t      = self.prof.clock()
         for i in range(self.cnf.pop_size):
-            _v.append(self.mutation(self.F, ead_pop, _b1, pop[i], _pb1))    # mutation
-            _ret.append(self.crossover(self.CR, pop[i], _v[i]))             # crossover
-        
-        return _ret
+            _v.append(_mutation(self.F, snp.pop, snp.b1, _i1 + i, snp.ib, _pb1))        # mutation
+            _t = self.prof.add(tag + "mutation", _t, self.sid)
+            _u.append(_crossover(self.CR, pop[i], _v[i]))                               # crossover
+            _t = self.prof.add(tag + "crossover", _t, self.sid)
+        return _u
 
     # get the best solution and its fitness
     def __getBestSolution(self, pop, fit):
@@ -94,16 +115,105 @@ class DifferentialEvolution:
         return pop[_argmin], fit[_argmin]
 
 
+class BatchDifferentialEvolution:
+
+    """ constructor """
+    # initialize method
+    def __init__(self, cnf, fnc, prof=None):
+        self.cnf        = cnf       # configuration instance
+        self.fnc        = fnc       # function
+        self.prof       = prof if prof is not None else NullProfiler()      # profiler
+        self.setStream(self.cnf.rd)
+
+
+    """ instance method """
+    # draw random numbers from "rd" after this
+    def setStream(self, rd):
+        self.rd         = rd        # random stream
+        self.selector   = DEVariant(self.cnf, self.fnc, self.rd)  # batch mutation and crossover
+
+    # trial solutions of all subpopulations, which are evaluated by the caller
+    def makeAllTrials(self, alg, snp, sur=None):
+        _n      = self.cnf.pop_size
+        _var    = np.array([[a.F, a.CR, a.v_MUTATION, a.v_CROSSOVER] for a in alg])
+        _grp    = np.repeat(np.arange(len(alg)), _n)                # subpopulation of each row
+        _cur    = np.arange(len(snp.pop))
+        if sur is None or not sur.isReady():
+            return self.makeTrials(snp, _cur, _var[_grp], _grp)
+        # pre-screen "prescreen_cand" candidates per solution
+        _cand   = np.array([self.makeTrials(snp, _cur, _var[_grp], _grp) for k in range(self.cnf.prescreen_cand)])
+        _t      = self.prof.clock()
+        _u      = sur.screen(_cand)
+        self.prof.add("prescreen", _t)
+        return _u
+
+    # selection of all subpopulations with the fitness _e of the trial solutions _u
+    # written in place, each subpopulation sees its rows through views
+    def selectAllTrials(self, snp, sto, _u, _e):
+        sto.grad[:] = (_e - snp.fit) / snp.fit
+        _win    = _e <= snp.fit
+        sto.pop[_win], sto.fit[_win] = _u[_win], _e[_win]
+
+    # at priorValidation component, emulate "analyte" candidate configurations of all losers at once
+    # return the configuration of each loser whose pseudo next-generation solutions come nearest to its target
+    def emulate(self, loser, target, snp, analyte):
+        _n, _l  = self.cnf.pop_size, len(loser)
+        if _l == 0:                                                 # every subpopulation made one of the top solutions
+            return []
+        _var    = np.stack([                                        # (losers, analyte, 4) candidate configurations
+            self.rd.rand(_l, analyte),
+            self.rd.rand(_l, analyte),
+            self.rd.randint(len(self.cnf.mutation), size=(_l, analyte)),
+            self.rd.randint(len(self.cnf.crossover), size=(_l, analyte))], axis=2)
+        _grp    = np.repeat(np.arange(_l * analyte), _n)            # candidate configuration of each row
+        _cur    = (np.asarray(loser)[:, None, None] * _n + np.arange(_n)).repeat(analyte, axis=1).ravel()
+        _u      = self.makeTrials(snp, _cur, _var.reshape(-1, 4)[_grp], _grp, "emulation/")
+
+        # score : minimum norm between the target and pseudo next-generation solutions of each candidate
+        _nrm    = np.linalg.norm(_u.reshape(_l, analyte, _n, -1) - np.asarray(target)[:, None, None, :], axis=3)
+        _tmp    = np.argmin(np.min(_nrm, axis=2), axis=1)
+        return [[_var[i, _tmp[i], 0], _var[i, _tmp[i], 1], int(_var[i, _tmp[i], 2]), int(_var[i, _tmp[i], 3])] for i in range(_l)]
+
+    # make trial solutions of the current solutions snp.pop[cur] with the configuration "var" of each row
+    # rows of the same group "grp" share x_p-best, as a subpopulation does ("tag" : prefix of the profiled phases)
+    def makeTrials(self, snp, cur, var, grp, tag=""):
+        _F, _CR = var[:, 0:1], var[:, 1:2]
+        _mut    = var[:, 2].astype(int)
+        _xov    = var[:, 3].astype(int)
+
+        _pb1    = None                      # x_p-best of each row (one per group)
+        _cp     = np.unique(grp[_mut == 2])
+        if len(_cp) > 0:
+            _sel = np.zeros(grp.max() + 1, dtype=int)
+            _sel[_cp] = self.rd.choice(snp.pool, len(_cp))
+            _pb1 = snp.pop[_sel[grp]]
+
+        _x      = snp.pop[cur]              # current solutions
+        _v      = np.empty_like(_x)         # mutant solutions
+        _u      = np.empty_like(_x)         # crossovered solutions
+        _t      = self.prof.clock()
+        for m in np.unique(_mut):           # mutation
+            _row = _mut == m
+            _v[_row] = self.selector.batch_mutation_map[m](_F[_row], snp.pop, snp.b1, snp.ib, cur[_row], None if _pb1 is None else _pb1[_row])
+        _t      = self.prof.add(tag + "mutation", _t)
+        for c in np.unique(_xov):           # crossover
+            _row = _xov == c
+            _u[_row] = self.selector.batch_crossover_map[c](_CR[_row], _x[_row], _v[_row])
+        self.prof.add(tag + "crossover", _t)
+        return _u
+
+
 
 class DEVariant:
 
     """ constructor """
     # initialize method
-    def __init__(self, cnf, fnc):
+    def __init__(self, cnf, fnc, rd=None):
 
         """ instance variable """
         self.cnf = cnf
         self.fnc = fnc
+        self.rd  = rd if rd is not None else cnf.rd     # random stream
 
         self.mutation_map = [
             # self.mutation_rand1,            # 0 : rand/1  
@@ -121,99 +231,174 @@ class DEVariant:
             self.crossover_exponential,     # 1 : exponential
         ]
 
+        self.batch_mutation_map = [         # the same order as "mutation_map"
+            # self.batch_mutation_rand1,      # 0 : rand/1
+            # self.batch_mutation_rand2,      # 1 : rand/2
+            self.batch_mutation_best1,      # 2 : best/1
+            # self.batch_mutation_best2,      # 3 : best/2
+            # self.batch_mutation_crand1,     # 4 : current-to-rand/1
+            self.batch_mutation_cbest1,     # 5 : current-to-best/1
+            self.batch_mutation_cpbest1,    # 6 : current-to-pbest/1
+            self.batch_mutation_rbest1      # 7 : rand-to-best/1
+        ]
+
+        self.batch_crossover_map = [        # the same order as "crossover_map"
+            self.batch_crossover_binomial,  # 0 : binomial
+            self.batch_crossover_exponential, # 1 : exponential
+        ]
+
 
     """ instance method """
     # *** mutation ***
-    # 0 : rand/1  
-    def mutation_rand1(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))     # get an index list
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        _r1, _r2, _r3 = self.cnf.rd.choice(tmp, 3)
-        r1, r2, r3 = pop[_r1], pop[_r2], pop[_r3]
-        return r1 + F * (r2 - r3)
+    # pop : population, i1 : index of the current solution, ib : index of the best solution b1
+    # 0 : rand/1
+    def mutation_rand1(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 3, exclude_best=False)
+        return pop[r[0]] + F * (pop[r[1]] - pop[r[2]])
 
     # 1 : rand/2
-    def mutation_rand2(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        _r1, _r2, _r3, _r4, _r5 = self.cnf.rd.choice(tmp, 5)
-        r1, r2, r3, r4, r5 = pop[_r1], pop[_r2], pop[_r3], pop[_r4], pop[_r5]
-        return r1 + F * (r2 - r3) + F * (r4 - r5)
+    def mutation_rand2(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 5, exclude_best=False)
+        return pop[r[0]] + F * (pop[r[1]] - pop[r[2]]) + F * (pop[r[3]] - pop[r[4]])
 
     # 2 : best/1
-    def mutation_best1(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        if not (n1 == b1).all(): tmp.remove(np.argmax(np.bincount(np.where(pop==b1)[0])))
-        _r1, _r2 = self.cnf.rd.choice(tmp, 2)
-        r1, r2 = pop[_r1], pop[_r2]
-        return b1 + F * (r1 - r2)
+    def mutation_best1(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 2)
+        return b1 + F * (pop[r[0]] - pop[r[1]])
 
     # 3 : best/2
-    def mutation_best2(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        if not (n1 == b1).all(): tmp.remove(np.argmax(np.bincount(np.where(pop==b1)[0])))
-        _r1, _r2, _r3, _r4 = self.cnf.rd.choice(tmp, 4)
-        r1, r2, r3, r4 = pop[_r1], pop[_r2], pop[_r3], pop[_r4]
-        return b1 + F * (r1 - r2) + F * (r3 - r4)
+    def mutation_best2(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 4)
+        return b1 + F * (pop[r[0]] - pop[r[1]]) + F * (pop[r[2]] - pop[r[3]])
 
     # 4 : current-to-rand/1
-    def mutation_crand1(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        _r1, _r2, _r3 = self.cnf.rd.choice(tmp, 3)
-        r1, r2, r3 = pop[_r1], pop[_r2], pop[_r3]
-        return n1 + F * (r1 - n1) + F * (r2 - r3)
+    def mutation_crand1(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 3, exclude_best=False)
+        n1 = pop[i1]
+        return n1 + F * (pop[r[0]] - n1) + F * (pop[r[1]] - pop[r[2]])
 
     # 5 : current-to-best/1
-    def mutation_cbest1(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        if not (n1 == b1).all(): tmp.remove(np.argmax(np.bincount(np.where(pop==b1)[0])))
-        _r1, _r2 = self.cnf.rd.choice(tmp, 2)
-        r1, r2 = pop[_r1], pop[_r2]
-        return n1 + F * (b1 - n1) + F * (r1 - r2)
+    def mutation_cbest1(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 2)
+        n1 = pop[i1]
+        return n1 + F * (b1 - n1) + F * (pop[r[0]] - pop[r[1]])
 
     # 6 : current-to-pbest/1
-    def mutation_cpbest1(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        if not (n1 == b1).all(): tmp.remove(np.argmax(np.bincount(np.where(pop==b1)[0])))
-        _r1, _r2 = self.cnf.rd.choice(tmp, 2)
-        r1, r2 = pop[_r1], pop[_r2]
-        return n1 + F * (pb1 - n1) + F * (r1 - r2)
+    def mutation_cpbest1(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 2)
+        n1 = pop[i1]
+        return n1 + F * (pb1 - n1) + F * (pop[r[0]] - pop[r[1]])
 
     # 7 : rand-to-best/1
-    def mutation_rbest1(self, F, pop, b1, n1, pb1):
-        tmp = list(range(len(pop)))
-        tmp.remove(np.argmax(np.bincount(np.where(pop==n1)[0])))
-        if not (n1 == b1).all(): tmp.remove(np.argmax(np.bincount(np.where(pop==b1)[0])))
-        _r1, _r2, _r3 = self.cnf.rd.choice(tmp, 3)
-        r1, r2, r3 = pop[_r1], pop[_r2], pop[_r3]
-        return r1 + F * (b1 - r1) + F * (r2 - r3)
+    def mutation_rbest1(self, F, pop, b1, i1, ib, pb1):
+        r = self.sampleIndex(len(pop), i1, ib, 3)
+        r1 = pop[r[0]]
+        return r1 + F * (b1 - r1) + F * (pop[r[1]] - pop[r[2]])
+
+    # draw "k" random indices of "pop" except i1 (and ib) : the same draws as a row of "sampleIndices"
+    def sampleIndex(self, n, i1, ib, k, exclude_best=True):
+        _lo, _hi = (min(i1, ib), max(i1, ib)) if exclude_best else (i1, i1)
+        _two = _lo != _hi                                   # whether two indices are excluded
+        r = self.rd.randint(0, n - 1 - _two, k).tolist()
+        for j in range(k):
+            r[j] += r[j] >= _lo                             # skip the lower excluded index
+            r[j] += _two and r[j] >= _hi                    # skip the higher excluded index
+        return r
 
     # *** crossover ***
     # 0 : binomial
     def crossover_binomial(self, CR, x, v):
-        rmat = self.cnf.rd.rand(self.cnf.prob_dim) < CR
-        rmat[self.cnf.rd.randint(self.cnf.prob_dim)] = True
-        u = np.copy(x)
-        u[rmat] = v[rmat]
-        u = np.clip(u, self.fnc.axis_range[0], self.fnc.axis_range[1])
-        return u
+        rmat = self.rd.rand(self.cnf.prob_dim) < CR
+        rmat[self.rd.randint(self.cnf.prob_dim)] = True
+        u = np.where(rmat, v, x)
+        return np.clip(u, self.fnc.axis_range[0], self.fnc.axis_range[1], out=u)
 
-    # 1 : exponential
+    # 1 : exponential (one random number per step : the sequence of the published results)
     def crossover_exponential(self, CR, x, v):
         k = 1
         u = np.copy(x)
-        j = self.cnf.rd.randint(self.cnf.prob_dim)
+        j = self.rd.randint(self.cnf.prob_dim)
         while True:
             u[j] = v[j]
             j = (1 + j) % self.cnf.prob_dim
             k += 1
-            if not((self.cnf.rd.rand() < CR) and (k < self.cnf.prob_dim)):
+            if not((self.rd.rand() < CR) and (k < self.cnf.prob_dim)):
                 u = np.clip(u, self.fnc.axis_range[0], self.fnc.axis_range[1])
                 return u
 
 
+    # *** batch mutation ***
+    # pop : (n, D) population, ib : index of the best, cur : (m,) indices of the current solutions, F : (m, 1)
+    # draw "k" random indices of "pop" for each current solution except itself (and the best)
+    # with replacement : the same draws as choosing from the index list without the excluded indices
+    def sampleIndices(self, n, cur, ib, k, exclude_best=True):
+        _lo = np.minimum(cur, ib) if exclude_best else cur
+        _hi = np.maximum(cur, ib) if exclude_best else cur
+        _two = (_lo != _hi)[:, None]                        # whether two indices are excluded
+        r = self.rd.randint(0, n - 1 - _two, (len(cur), k))
+        r += r >= _lo[:, None]                              # skip the lower excluded index
+        r += _two & (r >= _hi[:, None])                     # skip the higher excluded index
+        return r
+
+    # 0 : rand/1
+    def batch_mutation_rand1(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 3, exclude_best=False)
+        return pop[r[:, 0]] + F * (pop[r[:, 1]] - pop[r[:, 2]])
+
+    # 1 : rand/2
+    def batch_mutation_rand2(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 5, exclude_best=False)
+        return pop[r[:, 0]] + F * (pop[r[:, 1]] - pop[r[:, 2]]) + F * (pop[r[:, 3]] - pop[r[:, 4]])
+
+    # 2 : best/1
+    def batch_mutation_best1(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 2)
+        return b1 + F * (pop[r[:, 0]] - pop[r[:, 1]])
+
+    # 3 : best/2
+    def batch_mutation_best2(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 4)
+        return b1 + F * (pop[r[:, 0]] - pop[r[:, 1]]) + F * (pop[r[:, 2]] - pop[r[:, 3]])
+
+    # 4 : current-to-rand/1
+    def batch_mutation_crand1(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 3, exclude_best=False)
+        n1 = pop[cur]
+        return n1 + F * (pop[r[:, 0]] - n1) + F * (pop[r[:, 1]] - pop[r[:, 2]])
+
+    # 5 : current-to-best/1
+    def batch_mutation_cbest1(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 2)
+        n1 = pop[cur]
+        return n1 + F * (b1 - n1) + F * (pop[r[:, 0]] - pop[r[:, 1]])
+
+    # 6 : current-to-pbest/1
+    def batch_mutation_cpbest1(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 2)
+        n1 = pop[cur]
+        return n1 + F * (pb1 - n1) + F * (pop[r[:, 0]] - pop[r[:, 1]])
+
+    # 7 : rand-to-best/1
+    def batch_mutation_rbest1(self, F, pop, b1, ib, cur, pb1):
+        r = self.sampleIndices(len(pop), cur, ib, 3)
+        r1 = pop[r[:, 0]]
+        return r1 + F * (b1 - r1) + F * (pop[r[:, 1]] - pop[r[:, 2]])
+
+    # *** batch crossover ***
+    # x, v : (m, D) parents and mutants, CR : (m, 1) ; random numbers of all rows are drawn at once
+    # 0 : binomial
+    def batch_crossover_binomial(self, CR, x, v):
+        rmat = self.rd.rand(*x.shape) < CR
+        rmat[np.arange(len(x)), self.rd.randint(self.cnf.prob_dim, size=len(x))] = True
+        u = np.where(rmat, v, x)
+        return np.clip(u, self.fnc.axis_range[0], self.fnc.axis_range[1], out=u)
+
+    # 1 : exponential
+    # the segment of "v" starts at a random j and continues while rand < CR : L = 1 + (leading successes), L <= D - 1
+    def batch_crossover_exponential(self, CR, x, v):
+        m, D = x.shape
+        j = self.rd.randint(D, size=m)
+        succ = self.rd.rand(m, max(D - 2, 0)) < CR                     # whether the segment continues
+        L = 1 + np.cumprod(succ, axis=1).sum(axis=1)                        # length of the segment
+        u = np.where((np.arange(D) - j[:, None]) % D < L[:, None], v, x)    # offset from j is in the segment
+        return np.clip(u, self.fnc.axis_range[0], self.fnc.axis_range[1], out=u)
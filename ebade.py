@@ -6,10 +6,14 @@
 
 
 # import libraries and other files
-import time
+import os, time, pickle
+from   concurrent.futures   import ThreadPoolExecutor
 import numpy            as np
-from   scipy.spatial    import distance
-from   de               import DifferentialEvolution
+from   de               import DifferentialEvolution, BatchDifferentialEvolution
+from   population       import Snapshot, PopulationStore
+from   shared           import SharedPopulation
+from   surrogate        import makeSurrogate
+from   profiler         import makeProfiler
 
 
 class EmulationBasedAdaptiveDifferentialEvolution:
@@ -23,72 +27,242 @@ class EmulationBasedAdaptiveDifferentialEvolution:
         self.fnc    = fnc       # function instance
         self.log    = log       # logger instance
 
-        self.pop    = []        # P = {x_1 x_2 ... x_(pop_size * n)}    : whole population set
-        self.fit    = []        # F = {f(x_1) f(x_2) ... f(x_ )}        : whole fitness set
-        self.ids    = []        # [0 0 ... 0 1 1 ... 1 2 2 ... ... n]   : subpopulation IDs
-        self.grad   = []        # G = {g(x_1) g(x_2) ... g(x_ )}        : whole Fitness Improvement Rate (FIR) set
+        self.shm    = SharedPopulation(self.cnf, self.fnc) if self.cnf.procs > 1 else None     # population shared with worker processes
+        self.sto    = self.shm.sto if self.shm is not None else PopulationStore(self.cnf, self.fnc)    # preallocated whole population
+        self.pop    = self.sto.pop  # P = {x_1 x_2 ... x_(pop_size * n)}    : whole population set
+        self.fit    = self.sto.fit  # F = {f(x_1) f(x_2) ... f(x_ )}        : whole fitness set
+        self.ids    = self.sto.ids  # [0 0 ... 0 1 1 ... 1 2 2 ... ... n]   : subpopulation IDs
+        self.grad   = self.sto.grad # G = {g(x_1) g(x_2) ... g(x_ )}        : whole Fitness Improvement Rate (FIR) set
         self.alg    = []        # A = {DE_1 DE_2 ... DE_n}              : (ex) DEs
                                 # |P| = |F| = |ids| = pop_size * n
                                 # |A|               = n
+        self.prof   = makeProfiler(self.cnf)                            # profiler of each phase
+        self.bat    = BatchDifferentialEvolution(self.cnf, self.fnc, self.prof)     # batch DE of all subpopulations
+        self.snp    = None      # snapshot of P and F at the current generation (shared by all DEs and emulations)
+        self.sur    = makeSurrogate(self.cnf, self.fnc) if self.cnf.do_prescreen else None
+                                # surrogate model pre-screening trial solutions
 
         self.b1     = []        # x_best = [x1 x2 ... xD]               : the best solution
         self.bf     = np.inf    # f_best = f(x_best)                    : fitness of the best solution
+        self.stall_bf = np.inf  # f_best when it last improved by more than "stall_tol"
+        self.improved = 0       # the generation it improved
         self.loser  = []        # a set of IDs of the loser configurations
         self.target = []        # chosen targets to tune configurations
+        self.emuls  = 0         # the number of emulated configurations
+        self.analyte= self.cnf.analyte  # K of the current generation (adapted when "do_adapt")
+        self.won    = np.full(self.cnf.subpopulations, -np.inf)     # the last generation each subpopulation won
+        self.cost_eval = None   # seconds per evaluation                (moving average)
+        self.cost_emul = None   # seconds per emulated configuration    (moving average)
+        self.stp    = None      # generator of "steps" driven by "ask" and "tell"
+        self.pool   = None      # threads of subpopulations and losers ("threads" > 1, made while running)
+        self.asked  = None      # solutions of the last "ask"
 
 
     """ instance method """
-    # run CaDE
+    # run CaDE : resumed from the checkpoint if it exists
     def run(self, trial):
-        elapsed_time = self._initialize()
-        _end = False
-        while  self.fnc.total_gen < self.cnf.max_gen:
-            _end, elapsed_time = self._search(elapsed_time)
-            time_log = time.time()
-            if not _end:
-                self._posthocValidation()
-                self._priorValidation()
+        for _ in self.steps(self._evaluate):
+            pass
+
+    # step API : yield the solutions to be evaluated (the initial population, then trial solutions of each generation)
+    #            and receive their fitness by "send" ; the validations run between generations
+    #   stp = ead.steps(); x = next(stp)
+    #   while True: x = stp.send(f(x))              (until StopIteration)
+    # evaluate : function evaluating a matrix here and counting FEs itself (None : evaluated by the caller, counted here)
+    def steps(self, evaluate=None):
+        if self.cnf.threads > 1:
+            if self.cnf.rng != "spawn":        # threads would share one stream : results depend on their timing
+                raise ValueError("threads > 1 requires rng = \"spawn\"")
+            self.pool = ThreadPoolExecutor(max_workers=self.cnf.threads)
+        try:
+            if self.cnf.checkpoint_gen > 0 and os.path.isfile(self._checkpointPath()):
+                elapsed_time = self._resume()
+            else:
+                self._initialize()
+                if evaluate is None:
+                    self.fit[:] = yield np.copy(self.pop)
+                    self.fnc.countEvals(len(self.pop))
+                else:
+                    self.fit[:] = evaluate(self.pop)
+                elapsed_time = self._initialized()
+            if self.shm is not None:
+                self.shm.start(self.alg)
+            while not (reason := self.isTerminated()):
+                time_log = time.time()
+                prev_elapsed = elapsed_time
+                _u = self._makeTrials()
+                _t = time.perf_counter()
+                if evaluate is None:
+                    _e = np.asarray((yield _u), dtype=float)
+                    self.fnc.countEvals(len(_u))
+                else:
+                    _e = evaluate(_u)
+                self.cost_eval = self._average(self.cost_eval, (time.perf_counter() - _t) / len(_u))
+                elapsed_time = self._selectTrials(_u, _e, time_log - prev_elapsed)
                 time_log = time.time()
-            elapsed_time = time.time() - time_log + elapsed_time
-        self.log.outLog(self.fnc.total_evals, self.fnc.total_gen, self.bf)
+                if not self.isTerminated():         # no validation after the last generation
+                    _t = self.prof.clock()
+                    self._posthocValidation()
+                    _t = self.prof.add("posthoc", _t)
+                    self._priorValidation()
+                    self.prof.add("prior", _t)
+                    time_log = time.time()
+                elapsed_time = time.time() - time_log + elapsed_time
+                if self.cnf.checkpoint_gen > 0 and self.fnc.total_gen % self.cnf.checkpoint_gen == 0:
+                    self._checkpoint(elapsed_time)
+            self.log.outLog(self.fnc.total_evals, self.fnc.total_gen, self.bf, reason)
+            self.prof.outProfile(self.log.path_trial + '/trial{}_profile.csv'.format(self.cnf.seed))
+            if self.cnf.checkpoint_gen > 0 and os.path.isfile(self._checkpointPath()):
+                os.remove(self._checkpointPath())
+        finally:                                # also when the caller stops early (close) or evaluate raises
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+            if self.shm is not None:
+                self.shm.close()
+
+    # step API (ask/tell) : the solutions to be evaluated (None : terminated)
+    def ask(self):
+        if self.stp is None:
+            self.stp    = self.steps()
+            self.asked  = next(self.stp)
+        return self.asked
+
+    # step API (ask/tell) : give the fitness of the solutions of "ask" and go to the next generation
+    def tell(self, fit):
+        if self.stp is None:
+            raise RuntimeError("ask() must be called before tell()")
+        try:
+            self.asked  = self.stp.send(fit)
+        except StopIteration:
+            self.asked  = None
+
+    # why the run ends (None : not terminated) : "max_gen", "max_time" (time budget), "target_fx" (target fitness),
+    # "stall" (no improvement for "stall_gen" generations) or "diversity" (population collapsed below "diversity_tol")
+    def isTerminated(self):
+        if self.fnc.total_gen >= self.cnf.max_gen:
+            return "max_gen"
+        if self.cnf.max_time > 0 and time.time() - self.start >= self.cnf.max_time:
+            return "max_time"
+        if self.cnf.target_fx is not None and self.bf <= self.cnf.target_fx:
+            return "target_fx"
+        if self.cnf.stall_gen > 0 and self.fnc.total_gen - self.improved >= self.cnf.stall_gen:
+            return "stall"
+        if self.cnf.diversity_tol > 0 and self._getDiversity() < self.cnf.diversity_tol:
+            return "diversity"
+        return None
+
+    # save everything needed to continue the trial exactly as if it was not interrupted
+    def _checkpoint(self, elapsed_time):
+        _ckp = {
+            "pop"       : self.pop,
+            "fit"       : self.fit,
+            "grad"      : self.grad,
+            "variants"  : [[a.F, a.CR, a.v_MUTATION, a.v_CROSSOVER] for a in self.alg],
+            "b1"        : self.b1,
+            "bf"        : self.bf,
+            "evals"     : self.fnc.total_evals,
+            "gen"       : self.fnc.total_gen,
+            "time"      : elapsed_time - self.start,
+            "log"       : self.log.getState(),
+            "fnc"       : self.fnc.getState() if hasattr(self.fnc, "getState") else None,     # e.g. EvaluationArchive
+            "sur"       : None if self.sur is None else (self.sur.x, self.sur.y, self.sur.size, self.sur.head, self.sur.saved),
+            "adapt"     : (self.analyte, self.won, self.cost_eval, self.cost_emul),
+            "stall"     : (self.stall_bf, self.improved),
+            "rd"        : self.cnf.rd.get_state(),
+            "rds"       : self.shm.getStates() if self.shm is not None else [a.rd.get_state() for a in self.alg]
+        }
+        with open(self._checkpointPath() + ".tmp", "wb") as f:
+            pickle.dump(_ckp, f)
+        os.replace(self._checkpointPath() + ".tmp", self._checkpointPath())     # never a broken checkpoint
+
+    # load the checkpoint instead of "_initialize"
+    def _resume(self):
+        with open(self._checkpointPath(), "rb") as f:
+            _ckp = pickle.load(f)
+        self.pop[:], self.fit[:], self.grad[:] = _ckp["pop"], _ckp["fit"], _ckp["grad"]
+        for i in range(self.cnf.subpopulations):
+            self.alg.append(DifferentialEvolution(self.cnf, self.fnc, _ckp["variants"][i], i, self.sto, self.prof))
+        self.b1, self.bf = _ckp["b1"], _ckp["bf"]
+        self.fnc.total_evals, self.fnc.total_gen = _ckp["evals"], _ckp["gen"]
+        self.log.setState(_ckp["log"])
+        if _ckp["fnc"] is not None:
+            self.fnc.setState(_ckp["fnc"])
+        self.analyte, self.won, self.cost_eval, self.cost_emul = _ckp["adapt"]
+        self.stall_bf, self.improved = _ckp["stall"]
+        if self.sur is not None:
+            self.sur.x, self.sur.y, self.sur.size, self.sur.head, self.sur.saved = _ckp["sur"]
+            self.sur._train()
+        for i in range(self.cnf.subpopulations):
+            self.alg[i].rd.set_state(_ckp["rds"][i])
+        self.cnf.rd.set_state(_ckp["rd"])
+        self.start = time.time()
+        return self.start + _ckp["time"]
+
+    # where the checkpoint of the trial is saved
+    def _checkpointPath(self):
+        return self.log.path_trial + '/trial{}.ckpt'.format(self.cnf.seed)
 
-    # initialize all subpopulations, configurations and whole population
+    # initialize all subpopulations, configurations and whole population (evaluated by the caller)
     def _initialize(self):
         self.start = time.time()
         for i in range(self.cnf.subpopulations):
-            self.ids.extend([i for ij in range(self.cnf.pop_size)])
-            self.cnf.init_variants[2] = self.cnf.rd.randint(len(self.cnf.mutation))
-            self.cnf.init_variants[3] = self.cnf.rd.randint(len(self.cnf.crossover))
-            self.alg.append(DifferentialEvolution(self.cnf, self.fnc, self.cnf.init_variants))
-            self.alg[i].initializePopulation()
-            self.pop.extend(self.alg[i].pop)
-            self.fit.extend(self.alg[i].fit)
-            self.grad.extend(self.alg[i].grad)
+            rd = self.cnf.stream(0, i)
+            self.cnf.init_variants[2] = rd.randint(len(self.cnf.mutation))
+            self.cnf.init_variants[3] = rd.randint(len(self.cnf.crossover))
+            self.alg.append(DifferentialEvolution(self.cnf, self.fnc, self.cnf.init_variants, i, self.sto, self.prof, rd))
+            self.alg[i].initializePopulation(evaluate=False)
+
+    # after the initial population is evaluated
+    def _initialized(self):
+        if self.sur is not None:
+            self.sur.add(self.pop, self.fit)
         self.fnc.total_gen += 1
         self.b1, self.bf = self._getBestSolution()
+        self._checkImprovement()
         elapsed_time = time.time()
-        self.log.logging(self.fnc.total_evals, self.fnc.total_gen, elapsed_time-self.start, self.b1, self.bf)
+        self.log.logging(self.fnc.total_evals, self.fnc.total_gen, elapsed_time-self.start, self.b1, self.bf, self._getVariants())
         return elapsed_time
 
-    # search : with real fitness evaluation
-    def _search(self, elapsed_time):
-        if self.fnc.total_gen < self.cnf.max_gen:
-            time_log = time.time()
-            prev_elapsed = elapsed_time
-            ead_pop, ead_fit = np.copy(self.pop), np.copy(self.fit)
-            self.pop, self.fit, self.grad = [], [], []
-            for i in range(self.cnf.subpopulations):
-                self.alg[i].run(ead_pop, ead_fit, self.b1)
-                self.pop.extend(self.alg[i].pop)
-                self.fit.extend(self.alg[i].fit)
-                self.grad.extend(self.alg[i].grad)
-            self.fnc.total_gen += 1
-            self.b1, self.bf = self._getBestSolution()
-            elapsed_time = time.time()
-            self.log.logging(self.fnc.total_evals, self.fnc.total_gen, elapsed_time-(time_log-prev_elapsed)-self.start, self.b1, self.bf)
+    # evaluate all solutions of a generation at once : with real fitness evaluation
+    def _evaluate(self, x):
+        _t = self.prof.clock()
+        _e = self.fnc.doEvaluate(x)
+        self.prof.add("evaluation", _t)
+        return _e
+
+    # search (1/2) : trial solutions of all subpopulations
+    def _makeTrials(self):
+        self.prof.setGeneration(self.fnc.total_gen)
+        if self.shm is not None:
+            return self.shm.makeAllTrials(self.alg, self.fnc.total_gen)
+        snp = self._getSnapshot()
+        if self.cnf.do_batch:
+            self.bat.setStream(self.cnf.stream(2, self.fnc.total_gen))
+            return self.bat.makeAllTrials(self.alg, snp, self.sur)
+        return np.concatenate(self._map(lambda a: a.makeTrials(snp, self.sur), self.alg))
+
+    # search (2/2) : selection with the fitness _e of the trial solutions _u and logging
+    # "offset" is the time not to be counted in the log
+    def _selectTrials(self, _u, _e, offset):
+        _t = self.prof.clock()
+        if self.cnf.do_batch:
+            self.bat.selectAllTrials(self._getSnapshot(), self.sto, _u, _e)
         else:
-            return True, elapsed_time     # end
-        return False, elapsed_time
+            for i in range(self.cnf.subpopulations):
+                self.alg[i].selectTrials(_u[self.sto.rows(i)], _e[self.sto.rows(i)])
+        self.prof.add("selection", _t)
+        if self.sur is not None:
+            self.sur.add(_u, _e)
+            self.log.saved = self.sur.saved
+        self.fnc.total_gen += 1
+        self.b1, self.bf = self._getBestSolution()
+        self._checkImprovement()
+        elapsed_time = time.time()
+        _t = self.prof.clock()
+        self.log.logging(self.fnc.total_evals, self.fnc.total_gen, elapsed_time-offset-self.start, self.b1, self.bf, self._getVariants())
+        self.prof.add("logging", _t)
+        return elapsed_time
 
     # post-hoc validation : decide winner and loser configurations
     def _posthocValidation(self):
@@ -100,43 +274,94 @@ class EmulationBasedAdaptiveDifferentialEvolution:
         _winner = np.unique([self.ids[_sort[i]] for i in range(self.cnf.subpopulations)])
         # get a set of IDs loser (complement of "_winner")
         self.loser = np.setdiff1d(self.ids, _winner)
+        self.won[_winner] = self.fnc.total_gen
         # choose same target for all losers
         self.target = np.array([_top_n[0]] * len(self.loser))
 
     # prior validation : change loser configurations so that they can make next-generation solution nearby the target 
     def _priorValidation(self):
-        for i in range(len(self.loser)):
-           _variant = self.__tuning_configuration(self.alg[self.loser[i]], self.target[i])  # choose
-           self.alg[self.loser[i]].setVariants(_variant)                                # set
+        loser, target = self.loser, self.target
+        if self.cnf.skip_won > 0:                       # losers which won recently keep their configurations
+            _tune = self.fnc.total_gen - self.won[loser] > self.cnf.skip_won
+            loser, target = loser[_tune], target[_tune]
+        if self.cnf.do_adapt:
+            self.analyte = self._adaptAnalyte(len(loser))
+        _t = time.perf_counter()
+        self.__tuning(loser, target)
+        if len(loser) > 0:
+            self.cost_emul = self._average(self.cost_emul, (time.perf_counter() - _t) / (len(loser) * self.analyte))
+        if self.cnf.do_adapt or self.cnf.skip_won > 0:
+            self.log.logAdaptation(self.fnc.total_gen, self.analyte, len(loser), len(self.loser) - len(loser), self.cost_eval, self.cost_emul)
+
+    # tune configurations of "loser" toward "target" with K emulations each
+    def __tuning(self, loser, target):
+        self.emuls += len(loser) * self.analyte
+        if self.cnf.do_batch_emul:
+            self.bat.setStream(self.cnf.stream(3, self.fnc.total_gen))
+            _variants = self.bat.emulate(loser, target, self._getSnapshot(), self.analyte)
+            for i in range(len(loser)):
+                self.alg[loser[i]].setVariants(_variants[i])
+            return
+        if self.shm is not None:
+            _variants = self.shm.tune(loser, target, self.fnc.total_gen, self.analyte)
+            for i in range(len(loser)):
+                self.alg[loser[i]].setVariants(_variants[i])
+            return
+        snp = self._getSnapshot()
+        _variants = self._map(lambda i: self.__tuning_configuration(self.alg[loser[i]], target[i], snp), range(len(loser)))   # choose
+        for i in range(len(loser)):
+           self.alg[loser[i]].setVariants(_variants[i])                             # set
+
+    # K of the generation : the emulations of "n" losers take "adapt_budget" times the time of the evaluations of a generation
+    def _adaptAnalyte(self, n):
+        if self.cost_eval is None or self.cost_emul is None or n == 0:
+            return self.analyte
+        _k = self.cnf.adapt_budget * self.cost_eval * self.cnf.subpopulations * self.cnf.pop_size / (n * self.cost_emul)
+        return int(np.clip(_k, self.cnf.analyte_min, self.cnf.analyte_max))
+
+    # [func(a) for a in items] : run by the threads when "threads" > 1 (the results keep the order of "items")
+    # each subpopulation and each emulation draws from its own stream, so the results do not depend on the threads
+    def _map(self, func, items):
+        if self.pool is None:
+            return [func(a) for a in items]
+        return list(self.pool.map(func, items))
+
+    # moving average of measured costs
+    def _average(self, avg, new, rate=0.3):
+        return new if avg is None else (1. - rate) * avg + rate * new
 
     # detail of tuning
-    def __tuning_configuration(self, alg, target):
-        _var = []   # [[F_1 CR_1 mut_1 xov_1] ... [_ _ _ _analyte]] : a set of temporary variants
-        _nrm = []   # [score_1 score_2 ... score_analyte]           : a set of scores
-        for i in range(self.cnf.analyte):
-            _var.append(self.___variantSelector())
-            _nrm.append(self.___score(alg.testVariants(_var[i], alg.pop, alg.fit, self.pop, self.fit, self.b1, target), target))
-        _tmp = np.argmin(_nrm)
-        return _var[_tmp]
-
-    # choose variants randomly
-    def ___variantSelector(self):
-        _ret = []
-        _ret.append(self.cnf.rd.rand())
-        _ret.append(self.cnf.rd.rand())
-        _ret.append(self.cnf.rd.randint(len(self.cnf.mutation)))
-        _ret.append(self.cnf.rd.randint(len(self.cnf.crossover)))
-        return _ret
-
-    # get score : calculate average norm between the target and pseudo next-generation solutions
-    def ___score(self, pop, target):
-        _ret = np.min(np.linalg.norm(np.array(pop)-np.array(target), axis=1))
-        return _ret
+    def __tuning_configuration(self, alg, target, snp):
+        rd   = self.cnf.stream(1, self.fnc.total_gen, alg.sid)     # random stream of the emulation
+        return alg.emulate(target, snp, self.analyte, rd)
+
+    # get the snapshot of the current generation : made again when the generation advances
+    def _getSnapshot(self):
+        if self.snp is None:
+            self.snp = Snapshot(self.cnf, self.fnc.total_gen, self.pop, self.fit)
+        elif not self.snp.isValid(self.fnc.total_gen):
+            self.snp.copyFrom(self.fnc.total_gen, self.pop, self.fit)   # reuse the buffers
+        return self.snp
+
+    # get variants of all subpopulations to be logged : [[F CR mut xov] ...]
+    def _getVariants(self):
+        if not self.cnf.log_variants:
+            return None
+        return [[a.F, a.CR, a.v_MUTATION, a.v_CROSSOVER] for a in self.alg]
+
+    # remember the generation f_best improved by more than "stall_tol"
+    def _checkImprovement(self):
+        if self.bf < self.stall_bf - self.cnf.stall_tol:
+            self.stall_bf, self.improved = self.bf, self.fnc.total_gen
+
+    # diversity of the whole population : standard deviation per axis relative to the domain, averaged over the axes
+    def _getDiversity(self):
+        return np.mean(np.std(self.pop, axis=0) / (np.asarray(self.fnc.axis_range[1]) - np.asarray(self.fnc.axis_range[0])))
 
     # get the best solution and its fitness
     def _getBestSolution(self):
         _argmin = np.argmin(self.fit)
-        return self.pop[_argmin], self.fit[_argmin]
+        return np.copy(self.pop[_argmin]), self.fit[_argmin]
 
 
 
@@ -0,0 +1,174 @@
+###### evaluator.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for evaluators : submit all solutions of a batch concurrently to an expensive function
+# The instance is made by "makeEvaluator" and used as "fnc" in runner.py
+
+
+# import libraries and other files
+import os, sys, time, asyncio
+from   concurrent.futures   import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy            as np
+from   function         import Function, Simulator, PROBLEMS
+
+
+# make an evaluator of "fnc" chosen by "cnf.evaluator"
+def makeEvaluator(cnf, fnc):
+    if cnf.evaluator == "serial":
+        return fnc
+    elif cnf.evaluator == "thread":
+        return ThreadPoolEvaluator(fnc, cnf.eval_workers)
+    elif cnf.evaluator == "process":
+        return ProcessPoolEvaluator(fnc, cnf.eval_workers)
+    elif cnf.evaluator == "async":
+        return AsyncSubprocessEvaluator(fnc, cnf.eval_workers)
+    else:
+        print("Error: Do not exist evaluator {} (evaluator.py)".format(cnf.evaluator))
+        return None
+
+
+class Evaluator(Function):
+
+    """ constructor """
+    # initialize method : wrap "fnc", whose "evaluate" is called for each solution
+    def __init__(self, fnc, workers:int=1):
+
+        """ instance variable """
+        super().__init__(fnc.prob_dim, fnc.prob_name)
+        self.fnc            = fnc               # wrapped function instance
+        self.workers        = workers           # the number of solutions evaluated at the same time
+        self.axis_range     = fnc.axis_range
+        self.evaluate       = fnc.evaluate
+        if hasattr(fnc, "init_range"):
+            self.init_range = fnc.init_range
+
+
+    """ instance method """
+    # evaluate : all rows of a matrix are in flight at once (FEs are counted here)
+    def doEvaluate(self, x):
+        x = np.asarray(x, dtype=float)
+        if len(x.shape) == 2:
+            self.countEvals(x.shape[0])
+            return np.asarray(self.evaluateBatch(x))
+        self.countEvals(1)
+        return self.evaluateBatch(x[None])[0]
+
+    # evaluate rows of "x" : overridden by each evaluator
+    def evaluateBatch(self, x):
+        return [self.evaluate(x[i]) for i in range(x.shape[0])]
+
+    # release workers
+    def close(self):
+        pass
+
+
+
+class ThreadPoolEvaluator(Evaluator):
+
+    """ constructor """
+    # initialize method : for functions releasing GIL (I/O, sleep, native code)
+    def __init__(self, fnc, workers:int=4):
+        super().__init__(fnc, workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+
+
+    """ instance method """
+    def evaluateBatch(self, x):
+        return list(self.pool.map(self.evaluate, x))
+
+    def close(self):
+        self.pool.shutdown()
+
+
+
+class ProcessPoolEvaluator(Evaluator):
+
+    """ constructor """
+    # initialize method : "fnc" must be picklable
+    def __init__(self, fnc, workers:int=4):
+        super().__init__(fnc, workers)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+
+    """ instance method """
+    def evaluateBatch(self, x):
+        return list(self.pool.map(self.evaluate, x, chunksize=max(1, x.shape[0] // (4 * self.workers))))
+
+    def close(self):
+        self.pool.shutdown()
+
+
+
+class AsyncSubprocessEvaluator(Evaluator):
+
+    """ constructor """
+    # initialize method : "command" starts a local process serving one fitness per input line
+    #                     (default : the stand-in simulator of function.py, importing the module registering the problem)
+    def __init__(self, fnc, workers:int=4, command=None):
+        super().__init__(fnc, workers)
+        if command is None:
+            command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "function.py"),
+                       fnc.prob_name, str(fnc.prob_dim), str(getattr(fnc, "delay", 0.))]
+            if fnc.prob_name in PROBLEMS and PROBLEMS[fnc.prob_name]["module"] not in ["function", "__main__"]:
+                command.append(PROBLEMS[fnc.prob_name]["module"])
+        self.command    = command
+        self.loop       = asyncio.new_event_loop()
+        self.procs      = []                    # running subprocesses
+
+
+    """ instance method """
+    def evaluateBatch(self, x):
+        if len(self.procs) == 0:
+            self.loop.run_until_complete(self._start())
+        return self.loop.run_until_complete(self._evaluate(x))
+
+    def close(self):
+        if len(self.procs) > 0:
+            self.loop.run_until_complete(self._stop())
+        self.loop.close()
+
+    # start subprocesses
+    async def _start(self):
+        for i in range(self.workers):
+            self.procs.append(await asyncio.create_subprocess_exec(*self.command,
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE))
+
+    # stop subprocesses
+    async def _stop(self):
+        for proc in self.procs:
+            proc.stdin.close()
+            await proc.wait()
+        self.procs = []
+
+    # each subprocess takes the next solution from the queue until it becomes empty
+    async def _evaluate(self, x):
+        ret = [None] * x.shape[0]
+        que = asyncio.Queue()
+        for i in range(x.shape[0]):
+            que.put_nowait(i)
+        async def _serve(proc):
+            while not que.empty():
+                i = que.get_nowait()
+                proc.stdin.write((" ".join(repr(float(xi)) for xi in x[i]) + "\n").encode())
+                await proc.stdin.drain()
+                ret[i] = float(await proc.stdout.readline())
+        await asyncio.gather(*[_serve(proc) for proc in self.procs])
+        return ret
+
+
+
+""" main """
+# measure throughput of each evaluator with the stand-in simulator
+if __name__ == '__main__':
+    dim, n, delay, workers = 10, 32, 0.05, 8
+    x = np.random.uniform(-100., 100., (n, dim))
+    for name, evl in [("serial",  Evaluator(Simulator(dim, "F1", delay))),
+                      ("thread",  ThreadPoolEvaluator(Simulator(dim, "F1", delay), workers)),
+                      ("process", ProcessPoolEvaluator(Simulator(dim, "F1", delay), workers)),
+                      ("async",   AsyncSubprocessEvaluator(Simulator(dim, "F1", delay), workers))]:
+        evl.doEvaluate(x[:workers])                                     # warm up workers
+        start = time.time()
+        evl.doEvaluate(x)
+        elapsed = time.time() - start
+        evl.close()
+        print("{:8s}\t{:8.1f} evals/s".format(name, n / elapsed))
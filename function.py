@@ -6,8 +6,11 @@
 
 
 # import libraries and other files
+import sys, time, importlib, threading
 import numpy    as np
-from distutils.version import StrictVersion
+
+
+_COUNT  = threading.Lock()      # FEs may be counted by threads at once (a module lock : Function is pickled to processes)
 
 
 class Function:
@@ -25,22 +28,91 @@ class Function:
         self.total_gen   = 0
 
     """ instance method """
-    # evaluate
+    # evaluate : x is a vector or a matrix whose rows are evaluated one by one
     def doEvaluate(self, x):
-        self.total_evals += 1
         x = np.array(x)
+        if len(x.shape) == 2:
+            self.countEvals(x.shape[0])
+            return np.array([self.evaluate(x[i]) for i in range(x.shape[0])])
+        self.countEvals(1)
         return self.evaluate(x)
 
+    # count "n" FEs : thread-safe
+    def countEvals(self, n):
+        with _COUNT:
+            self.total_evals += n
+
     # reset FEs
     def resetTotalEvals(self):
         self.total_evals = 0
         self.total_gen   = 0
 
 
+# *** problem registry ***
+PROBLEMS    = {}    # {name: {"bounds", "kernel", "batch", "init_range", "setup", "module"}} : problems made by "Basic"
+_PARAMS     = {}    # {(name, dim): {attribute: value}}  : results of "setup", made once per (problem, dimension)
+
+
+# register a problem "name" (overwritten if exists)
+#   bounds     : (lower, upper) of the domain, scalars or (D,) vectors
+#   kernel     : kernel(fnc, x) of a (D,) vector x ; "fnc" is the Basic instance with the attributes made by "setup"
+#   batch      : batch(fnc, x) of x evaluated along the last axis, (D,) or (n, D) : preferred to "kernel" when given
+#   init_range : (lower, upper) of the initial solutions (None : bounds)
+#   setup      : setup(dim) returns {attribute: value} of the dimension (e.g. constants, shift vectors, rotation matrices)
+def register(name, bounds, kernel=None, batch=None, init_range=None, setup=None):
+    if kernel is None and batch is None:
+        print("Error: Function {} has no kernel (function.py)".format(name))
+        return
+    PROBLEMS[name] = {"bounds": bounds, "kernel": kernel, "batch": batch, "init_range": init_range, "setup": setup,
+                      "module": (batch if batch is not None else kernel).__module__}    # imported by other processes
+    for key in [key for key in _PARAMS if key[0] == name]:
+        del _PARAMS[key]
+
+# register a shifted and rotated (CEC style) variant "name" of a registered problem "base" : f_base(R (x - o))
+# o is uniform in "shift" times the domain and R is a random orthogonal matrix (rotate=False : identity),
+# both drawn from "seed" and the dimension, so that every trial of the dimension sees the same problem
+def registerShifted(name, base, shift=0.8, rotate=True, seed=0):
+    prb = PROBLEMS[base]
+    def setup(dim):
+        ret = dict(getParams(base, dim))
+        rd  = np.random.RandomState(seed + dim)
+        lower, upper = _broadcast(prb["bounds"][0], dim), _broadcast(prb["bounds"][1], dim)
+        ret["shift"]    = rd.uniform(shift * lower, shift * upper)
+        ret["rotation"] = None
+        if rotate:
+            q, r = np.linalg.qr(rd.normal(size=(dim, dim)))
+            ret["rotation"] = q * np.sign(np.diag(r))           # uniform over orthogonal matrices
+        ret["base"]     = prb["batch"] if prb["batch"] is not None else prb["kernel"]
+        return ret
+    if prb["batch"] is not None:
+        register(name, prb["bounds"], batch=_transformed, init_range=prb["init_range"], setup=setup)
+    else:
+        register(name, prb["bounds"], kernel=_transformed, init_range=prb["init_range"], setup=setup)
+    PROBLEMS[name]["module"] = prb["module"]
+
+# attributes of the problem "name" of "dim" dimensions : made by "setup" at first, then cached
+def getParams(name, dim):
+    if (name, dim) not in _PARAMS:
+        setup = PROBLEMS[name]["setup"]
+        _PARAMS[(name, dim)] = {} if setup is None else setup(dim)
+    return _PARAMS[(name, dim)]
+
+# kernel of the variants of "registerShifted"
+def _transformed(fnc, x):
+    z = x - fnc.shift
+    if fnc.rotation is not None:
+        z = np.sum(z[..., None, :] * fnc.rotation, axis=-1)    # the same rounding for a vector and each row of a matrix
+    return fnc.base(fnc, z)
+
+# (D,) vector of a scalar or a vector
+def _broadcast(v, dim):
+    return np.broadcast_to(np.asarray(v, dtype=float), (dim,)).copy()
+
+
 class Basic(Function):
 
     """ constructor """
-    # initialize method
+    # initialize method : "prob_name" is a name registered in PROBLEMS
     def __init__(self, prob_dim:int, prob_name:str):
 
         """ instance variable """
@@ -49,50 +121,30 @@ class Basic(Function):
         self.evaluate       = None
         self.total_evals    = 0
         self.total_gen      = 0
-        self.axis_range     = [np.full(self.prob_dim, -100.), np.full(self.prob_dim, 100.)]
 
         # choice of functions
-        if self.prob_name == "F1":
-            self.evaluate = self.F1
-        elif self.prob_name == "F2":
-            self.evaluate = self.F2
-            self.axis_range  = [np.full(self.prob_dim, -2.048), np.full(self.prob_dim, 2.048)]
-        elif self.prob_name == "F3":
-            self.evaluate = self.F3
-            self.axis_range  = [np.full(self.prob_dim, -32.768), np.full(self.prob_dim, 32.768)]
-        elif self.prob_name == "F4":
-            self.evaluate = self.F4
-            self.axis_range  = [np.full(self.prob_dim, -5.12), np.full(self.prob_dim, 5.12)]
-        elif self.prob_name == "F5":
-            self.evaluate = self.F5
-            self.axis_range  = [np.full(self.prob_dim, -600.), np.full(self.prob_dim, 600.)]
-        elif self.prob_name == "F6":
-            self.evaluate = self.F6
-            self.axis_range  = [np.full(self.prob_dim, -0.5), np.full(self.prob_dim, 0.5)]
-        elif self.prob_name == "F7":
-            self.evaluate = self.F7
-            self.axis_range  = [np.full(self.prob_dim, -500.), np.full(self.prob_dim, 500.)]
-        else:
+        if self.prob_name not in PROBLEMS:
             print("Error: Do not exist Function {} (function.py)".format(prob_name))
             return None
-
-        print("\t[ Problem {} ]".format(prob_name))
-
-        # numpy version check
-        if StrictVersion(np.version.version) < StrictVersion("1.19"):
-            print("Error: Numpy version >= 1.19 required. But {} now.".format(np.version.version))
-            return None
+        prb = PROBLEMS[self.prob_name]
+        self.__dict__.update(getParams(self.prob_name, self.prob_dim))      # cached per (problem, dimension)
+        self.axis_range     = [_broadcast(prb["bounds"][0], self.prob_dim), _broadcast(prb["bounds"][1], self.prob_dim)]
+        if prb["init_range"] is not None:
+            self.init_range = [_broadcast(prb["init_range"][0], self.prob_dim), _broadcast(prb["init_range"][1], self.prob_dim)]
+        if prb["batch"] is not None:                    # vectorized kernel
+            self.kernel     = prb["batch"]
+            self.evaluate   = self._evaluateBatch
+        else:
+            self.kernel     = prb["kernel"]
+            self.evaluate   = self._evaluateRows
 
     def doEvaluate(self, x):
         x = np.asarray(x)
         if len(x.shape) == 2:
-            self.total_evals += x.shape[0]
-            ret = []
-            for i in range(x.shape[0]):
-                ret.append(self.evaluate(x[i]))
-            ret = np.asarray(ret)
+            self.countEvals(x.shape[0])
+            ret = np.asarray(self.evaluate(x))     # all rows at once
         elif len(x.shape) == 1:
-            self.total_evals += 1
+            self.countEvals(1)
             ret = self.evaluate(x)
         return ret
 
@@ -107,63 +159,110 @@ class Basic(Function):
         else:
             return True
 
+    # evaluate with a vectorized kernel : x is a vector or a matrix
+    def _evaluateBatch(self, x):
+        return self.kernel(self, x)
+
+    # evaluate with a kernel of a vector : rows of a matrix one by one
+    def _evaluateRows(self, x):
+        if len(x.shape) == 2:
+            return np.array([self.kernel(self, x[i]) for i in range(x.shape[0])])
+        return self.kernel(self, x)
+
+    # *** benchmark kernels ***
+    # x : (D,) vector or (n, D) matrix, evaluated along the last axis
     # Sphere
     def F1(self, x):
-        ret = 0.
-        for i in range(self.prob_dim):
-            ret += x[i] * x[i]
+        ret = np.sum(x * x, axis=-1)
         return ret
 
     # Rosenbrock
     def F2(self, x):
-        ret = 0.
-        for i in range(self.prob_dim - 1):
-            ret += 100 * (x[i]**2 - x[i+1])**2 + (x[i] - 1)**2
+        ret = np.sum(100 * (x[..., :-1]**2 - x[..., 1:])**2 + (x[..., :-1] - 1)**2, axis=-1)
         return ret
 
     # Ackley
     def F3(self, x):
-        sum_1 = 0.
-        sum_2 = 0.
-        for i in range(self.prob_dim):
-            sum_1 += x[i] * x[i]
-            sum_2 += np.cos(2 * np.pi * x[i])
+        sum_1 = np.sum(x * x, axis=-1)
+        sum_2 = np.sum(np.cos(2 * np.pi * x), axis=-1)
         ret = -20 * np.exp(-0.2 * np.sqrt(sum_1 / self.prob_dim)) - np.exp(sum_2 / self.prob_dim) + 20 + np.e
         return ret
 
     # Rastrigin
     def F4(self, x):
-        ret = 0.
-        for i in range(self.prob_dim):
-            ret += x[i]**2 - 10 *np.cos( 2 * np.pi * x[i] ) + 10
+        ret = np.sum(x**2 - 10 * np.cos(2 * np.pi * x) + 10, axis=-1)
         return ret
 
     # Griewank
     def F5(self, x):
-        sum_1 = 0.
-        prod_1 = 1.
-        for i in range(self.prob_dim):
-            sum_1 += x[i] * x[i]
-            prod_1 *= np.cos(x[i] / np.sqrt(i + 1))
+        sum_1 = np.sum(x * x, axis=-1)
+        prod_1 = np.prod(np.cos(x / self.sqrt_i), axis=-1)
         ret = 1. - prod_1 + sum_1 / 4000.
         return ret
 
     # Weierstrass
     def F6(self, x):
-        a, b, kmax = 0.5, 3, 20
-        ret, tmp = 0., 0.
-        for i in range(self.prob_dim):
-            for k in range(kmax):
-                ret += a**k * np.cos( 2 * np.pi * b**k * ( x[i] + 0.5 ) )
-        for k in range(kmax):
-            tmp += a**k * np.cos( np.pi * b**k)
-        ret -= self.prob_dim * tmp
+        ret = np.sum(self.a_k * np.cos(2 * np.pi * self.b_k * (x[..., None] + 0.5)), axis=(-2, -1))
+        ret -= self.offset
         return ret
 
     # Schwefel
     def F7(self, x):
-        sum_1 = 0.
-        for i in range(self.prob_dim):
-            sum_1 += x[i] * np.sin(np.sqrt(abs(x[i])))
+        sum_1 = np.sum(x * np.sin(np.sqrt(np.abs(x))), axis=-1)
         ret = 418.9829 * self.prob_dim - sum_1
         return ret
+
+
+
+# *** built-in problems ***
+# F1-F7 : their vectorized kernels with precomputed constants
+def _setupF6(dim, a=0.5, b=3, kmax=20):
+    a_k, b_k = a ** np.arange(kmax), b ** np.arange(kmax)      # [a^0 a^1 ... a^(kmax-1)], [b^0 b^1 ... b^(kmax-1)]
+    return {"a_k": a_k, "b_k": b_k, "offset": dim * np.sum(a_k * np.cos(np.pi * b_k))}
+
+register("F1", (-100.,   100.),   batch=Basic.F1)
+register("F2", (-2.048,  2.048),  batch=Basic.F2)
+register("F3", (-32.768, 32.768), batch=Basic.F3)
+register("F4", (-5.12,   5.12),   batch=Basic.F4)
+register("F5", (-600.,   600.),   batch=Basic.F5, setup=lambda dim: {"sqrt_i": np.sqrt(np.arange(1, dim + 1))})   # sqrt(i + 1)
+register("F6", (-0.5,    0.5),    batch=Basic.F6, setup=_setupF6)
+register("F7", (-500.,   500.),   batch=Basic.F7)
+# F1_SR-F7_SR : shifted and rotated F1-F7
+for _name in ["F1", "F2", "F3", "F4", "F5", "F6", "F7"]:
+    registerShifted(_name + "_SR", _name)
+
+
+
+class Simulator(Basic):
+
+    """ constructor """
+    # initialize method : a local stand-in of an expensive simulator (sleep "delay" seconds per solution)
+    def __init__(self, prob_dim:int, prob_name:str, delay:float=1.):
+
+        """ instance variable """
+        super().__init__(prob_dim, prob_name)
+        self.delay          = delay         # seconds per fitness evaluation
+        self.simulated      = self.evaluate # benchmark function behind the simulator
+        self.evaluate       = self.simulate
+
+
+    """ instance method """
+    # simulate : x is a vector or a matrix
+    def simulate(self, x):
+        time.sleep(self.delay * (x.shape[0] if len(x.shape) == 2 else 1))
+        return self.simulated(x)
+
+
+
+""" main """
+# serve the simulator through stdin/stdout : "python function.py F1 10 0.5 [module]"
+# one line of space separated floats in, one line of the fitness out ("module" registering the problem is imported)
+if __name__ == '__main__':
+    import function                             # the registry other modules register problems to
+    if len(sys.argv) > 4:
+        importlib.import_module(sys.argv[4])
+    sim = function.Simulator(int(sys.argv[2]), sys.argv[1], float(sys.argv[3]))
+    for line in sys.stdin:
+        x = np.array(line.split(), dtype=float)
+        sys.stdout.write(repr(float(sim.evaluate(x))) + "\n")
+        sys.stdout.flush()
@@ -6,9 +6,28 @@
 
 
 # import libraries and other files
-import os.path
+import os, sys, shutil
 import numpy            as np
-import pandas           as pd
+
+
+# read a trial log (csv or npy) as a structured array : dat["evals"], dat["fx"], ...
+def readTrial(path_trial, seed):
+    if os.path.isfile(path_trial + '/trial{}.npy'.format(seed)):
+        return np.load(path_trial + '/trial{}.npy'.format(seed), mmap_mode='r')
+    # ndmin=1 : a trial stopped at the initial generation has one row (not a 0-d record)
+    return np.genfromtxt(path_trial + '/trial{}.csv'.format(seed), delimiter=',', names=True, ndmin=1)
+
+# export npy trial logs in "path_trial" to csv files (post-processing)
+def exportCSV(path_trial):
+    for name in sorted(os.listdir(path_trial)):
+        if name.endswith('.npy'):
+            dat = np.load(path_trial + '/' + name, mmap_mode='r')
+            if dat.dtype.names is not None:         # trial{seed}.npy
+                np.savetxt(path_trial + '/' + name[:-4] + '.csv', dat.view((float, len(dat.dtype.names))),
+                           delimiter=',', header=','.join(dat.dtype.names), comments='')
+            else:                                   # trial{seed}_x.npy, trial{seed}_var.npy
+                np.savetxt(path_trial + '/' + name[:-4] + '.csv', dat.reshape(len(dat), -1), delimiter=',')
+
 
 
 class Logger:
@@ -20,7 +39,13 @@ class Logger:
         """ instance variable """
         self.cnf, self.fnc  = cnf, fnc
         self.dat            = []                        # where data temporary stored
+        self.dat_x          = []                        # the best solution of each generation (npy, "log_x")
+        self.dat_var        = []                        # variants of each subpopulation (npy, "log_variants")
+        self.dat_adapt      = []                        # decisions of the adaptive emulation ("do_adapt", "skip_won")
+        self.written        = 0                         # the number of records flushed to disk (npy)
+        self.last           = None                      # (evals, fx) of the last finished trial
         self.prob_name      = prob_name
+        self.saved          = 0                         # the number of trial candidates screened out by a surrogate
 
         # settings of path
         self.path_out       = self.cnf.path_out
@@ -31,20 +56,113 @@ class Logger:
 
 
     """ instance method """
-    # get a log of the best solution
-    def logging(self, evals, gen, _time, x_best, f_best):
+    # whether the trial of "seed" has been logged
+    def hasTrial(self, seed):
+        return os.path.isfile(self.path_trial + '/trial{}.csv'.format(seed)) or \
+               os.path.isfile(self.path_trial + '/trial{}.npy'.format(seed))
+
+    # get a log of the best solution : "variants" is (subpopulations, 4) [F, CR, ID_mutation, ID_crossover]
+    def logging(self, evals, gen, _time, x_best, f_best, variants=None):
         if self.cnf.do_console:
             print(" live score =>\tgen: {:04}\tevals: {:06}\tfx: {}".format(gen, evals, f_best))
         _sls = [evals, gen, _time, f_best]              # the best solution(evals, gen, f)
-        # _sls.extend(x_best)                             # the best solution(x)
+        if self.cnf.do_prescreen:
+            _sls.append(self.saved)                     # evaluations saved by pre-screening
+        if self.cnf.log_format == "csv":
+            if self.cnf.log_x:
+                _sls.extend(x_best)                     # the best solution(x)
+        else:
+            if self.cnf.log_x:
+                self.dat_x.append(x_best)
+            if self.cnf.log_variants:
+                self.dat_var.append(variants)
         self.dat.append(_sls)                           # join
-    
-    # output csv file
-    def outLog(self, evals, gen, f_best):
-        _head = "evals,gen,time,fx"
-        np.savetxt(self.path_trial +'/trial{}.csv'.format(self.cnf.seed), np.array(self.dat), delimiter=',', header = _head, comments = '')
+        if self.cnf.log_format == "npy" and len(self.dat) >= self.cnf.log_flush:
+            self._flush()
+
+    # get a decision of the adaptive emulation : K, the number of tuned and skipped losers, measured costs
+    def logAdaptation(self, gen, analyte, tuned, skipped, cost_eval, cost_emul):
+        self.dat_adapt.append([gen, analyte, tuned, skipped,
+                               np.nan if cost_eval is None else cost_eval, np.nan if cost_emul is None else cost_emul])
+
+    # output a log file : "reason" is why the trial stopped (ead.isTerminated), recorded with the evaluations used
+    def outLog(self, evals, gen, f_best, reason=None):
+        _head = self._columns()
+        if self.cnf.log_format == "csv":
+            if self.cnf.log_x:
+                _head.extend(["x{}".format(i+1) for i in range(self.cnf.prob_dim)])
+            _dat = np.array(self.dat)
+            np.savetxt(self.path_trial +'/trial{}.csv'.format(self.cnf.seed), _dat, delimiter=',', header = ','.join(_head), comments = '')
+            self.last = (_dat[:, 0], _dat[:, 3])        # (evals, fx) of the trial for statistics
+        else:
+            self._flush()
+            _path = self.path_trial + '/trial{}'.format(self.cnf.seed)
+            self._finalize(_path, np.dtype([(h, '<f8') for h in _head]), ())
+            if self.cnf.log_x:
+                self._finalize(_path + '_x', np.dtype('<f4'), (self.cnf.prob_dim,))
+            if self.cnf.log_variants:
+                self._finalize(_path + '_var', np.dtype('<f4'), (self.cnf.subpopulations, 4))
+            _dat = readTrial(self.path_trial, self.cnf.seed)
+            self.last = (np.array(_dat['evals']), np.array(_dat['fx']))
+        if len(self.dat_adapt) > 0:
+            np.savetxt(self.path_trial + '/trial{}_adapt.csv'.format(self.cnf.seed), np.array(self.dat_adapt), delimiter=',',
+                       header = "gen,analyte,tuned,skipped,cost_eval,cost_emul", comments = '')
+        with open(self.path_trial + '/trial{}_stop.csv'.format(self.cnf.seed), 'w') as f:
+            f.write("reason,evals,gen,fx\n{},{},{},{!r}\n".format(reason, evals, gen, float(f_best)))
         print("*** trial: {:03}  finished *** \n\tresult =>\tgen: {:04}\tevals: {:06}\tfx: {}".format(self.cnf.seed, gen, evals, f_best))
+        if reason is not None and reason != "max_gen":
+            print("\tstopped =>\treason: {}\tevals: {:06} ({:.1f}% of max_evals)".format(reason, evals, 100. * evals / self.cnf.max_evals))
+        if self.cnf.do_prescreen:
+            # a baseline evaluating all candidates needs "evals + saved" evaluations for the same search
+            print("\tpre-screening =>\tsaved: {:06}\t({:.1f}% of {:06} candidates)".format(self.saved, 100. * self.saved / (evals + self.saved), evals + self.saved))
         self.dat = []                                   # refresh
+        self.dat_adapt = []
+        self.saved = 0
+        self.written = 0
+
+    # state for a checkpoint : records flushed after it are discarded when resumed
+    def getState(self):
+        return self.dat, self.dat_x, self.dat_var, self.dat_adapt, self.written, self.saved
+
+    def setState(self, state):
+        self.dat, self.dat_x, self.dat_var, self.dat_adapt, self.written, self.saved = state
+        for _part, _dtype, _row, _dat in self._streams():
+            if os.path.isfile(_part):
+                with open(_part, 'r+b') as f:
+                    f.truncate(self.written * _dtype.itemsize * int(np.prod(_row)))
+
+    # names of the columns
+    def _columns(self):
+        _head = ["evals", "gen", "time", "fx"]
+        if self.cnf.do_prescreen:
+            _head.append("saved")
+        return _head
+
+    # (file being written, dtype, shape of a record, buffered records) of each stream
+    def _streams(self):
+        _path = self.path_trial + '/trial{}'.format(self.cnf.seed)
+        _ret = [(_path + '.part', np.dtype('<f8'), (len(self._columns()),), self.dat)]
+        if self.cnf.log_x:
+            _ret.append((_path + '_x.part', np.dtype('<f4'), (self.cnf.prob_dim,), self.dat_x))
+        if self.cnf.log_variants:
+            _ret.append((_path + '_var.part', np.dtype('<f4'), (self.cnf.subpopulations, 4), self.dat_var))
+        return _ret
+
+    # append the buffered records to the files being written (a file left by a crashed trial is overwritten)
+    def _flush(self):
+        for _part, _dtype, _row, _dat in self._streams():
+            with open(_part, 'ab' if self.written > 0 else 'wb') as f:
+                f.write(np.asarray(_dat, dtype=_dtype).tobytes())
+        self.written += len(self.dat)
+        self.dat, self.dat_x, self.dat_var = [], [], []
+
+    # make a npy file of the written records without loading them
+    def _finalize(self, path, dtype, row):
+        with open(path + '.part', 'rb') as src, open(path + '.npy', 'wb') as dst:
+            np.lib.format.write_array_header_1_0(dst, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                       'fortran_order': False, 'shape': (self.written,) + row})
+            shutil.copyfileobj(src, dst)
+        os.remove(path + '.part')
 
 
 
@@ -59,46 +177,66 @@ class Statistics:
         self.path_dat = path_dat
         self.cnf      = cnf
         self.fnc      = fnc
+        self.evals    = None                            # (generations,)         : index of the rows (of the longest trial)
+        self.fx       = None                            # (generations, trials)  : f_best of each trial (column : seed - 1)
+                                                        # a trial stopped early keeps its last f_best in the rows after it
+        self.added    = np.zeros(cnf.max_trial, dtype=bool)     # whether each trial has been added
 
 
     """ instance method """
-    # make a statistics file
+    # add a finished trial : (evals, fx) are given by the runner, or read from its log file
+    def addTrial(self, seed, evals=None, fx=None):
+        if fx is None:
+            dat = readTrial(self.path_dat, seed)
+            evals, fx = dat['evals'], dat['fx']
+        evals, fx = np.atleast_1d(evals), np.atleast_1d(fx)
+        if self.fx is None:
+            self.evals = np.array(evals)
+            self.fx = np.full((len(self.evals), self.cnf.max_trial), np.nan)
+        elif len(fx) > len(self.evals):                 # longer than the trials added so far : they keep their last rows
+            self.fx = np.concatenate([self.fx, np.repeat(self.fx[-1:], len(fx) - len(self.evals), axis=0)])
+            self.evals = np.array(evals)
+        self.fx[:len(fx), seed-1] = fx
+        self.fx[len(fx):, seed-1] = fx[-1]
+        self.added[seed-1] = True
+
+    # statistics over the trials added so far : computed along all generations at once
+    def getStatistics(self):
+        _fx  = self.fx[:, self.added]
+        _res = np.percentile(_fx, [25, 50, 75], axis=1)
+        return {
+            'min' : _fx.min(axis=1),
+            'q25' : _res[0],
+            'med' : _res[1],
+            'q75' : _res[2],
+            'max' : _fx.max(axis=1),
+            'ave' : _fx.mean(axis=1),
+            'std' : _fx.std(axis=1)
+            }
+
+    # make a statistics file : trials not added yet are read from their log files
     def outStatistics(self):
-        # read all trial csv files
-        df = None                                       # data frame
+        import pandas as pd                             # pandas is imported only when statistics are made
         for i in range(self.cnf.max_trial):
-            dat = pd.read_csv(self.path_dat+'/trial{}.csv'.format(i+1), index_col = 0)
-            if i == 0:
-                df = pd.DataFrame({'trial{}'.format(i+1) : np.array(dat['fx'])}, index = dat.index)
-            else:
-                df['trial{}'.format(i+1)] = np.array(dat['fx'])
+            if not self.added[i]:
+                self.addTrial(i+1)
+        _idx = pd.Index(self.evals, name = 'evals')
+
         # output csv file
-        df.to_csv(self.path_out + "all_trials.csv")
+        pd.DataFrame(self.fx, index = _idx, columns = ['trial{}'.format(i+1) for i in range(self.cnf.max_trial)]).to_csv(self.path_out + "all_trials.csv")
 
         # handling (minimum, maximum, 25 percentile, median, 75 percentile, average, standard deviation）
-        _min, _max, _q25, _med, _q75, _ave, _std = [], [], [], [], [], [], []
-        for i in range(len(df.index)):
-            dat = np.array(df.loc[df.index[i]])
-            res = np.percentile(dat, [25, 50, 75])
-            _min.append(dat.min())
-            _max.append(dat.max())
-            _q25.append(res[0])
-            _med.append(res[1])
-            _q75.append(res[2])
-            _ave.append(dat.mean())
-            _std.append(dat.std())
-
-        # make a data frame
-        _out = pd.DataFrame({
-            'min' : np.array(_min),
-            'q25' : np.array(_q25),
-            'med' : np.array(_med),
-            'q75' : np.array(_q75),
-            'max' : np.array(_max),
-            'ave' : np.array(_ave),
-            'std' : np.array(_std)
-            },index = df.index)
+        pd.DataFrame(self.getStatistics(), index = _idx).to_csv(self.path_out + "statistics.csv")
+
+        # why and when each trial stopped
+        _stop = [pd.read_csv(self.path_dat + '/trial{}_stop.csv'.format(i+1)).assign(trial = i+1)
+                 for i in range(self.cnf.max_trial) if os.path.isfile(self.path_dat + '/trial{}_stop.csv'.format(i+1))]
+        if len(_stop) > 0:
+            pd.concat(_stop).set_index('trial').to_csv(self.path_out + "stops.csv")
+
 
-        # output csv file
-        _out.to_csv(self.path_out + "statistics.csv")
 
+""" main """
+# export npy trial logs to csv files : "python logger.py ./_log/EBADE_K6-M25_D10/F1/trials"
+if __name__ == '__main__':
+    exportCSV(sys.argv[1])
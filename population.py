@@ -0,0 +1,67 @@
+###### population.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for the whole population shared by all subpopulations
+# The instances are made and named "snp" and "sto" in EmulationBasedAdaptiveDifferentialEvolution class
+
+
+# import libraries and other files
+import numpy            as np
+
+
+class Snapshot:
+
+    """ constructor """
+    # initialize method : the whole population (pop, fit) at generation "gen", computed once and read by all DEs
+    # copy : False reads (pop, fit) in place, which must not change during the generation (a worker of shared.py)
+    def __init__(self, cnf, gen, pop, fit, copy=True):
+
+        """ instance variable """
+        self.cnf    = cnf
+        self.pop    = np.array(pop, dtype=float, order="C") if copy else pop    # (M*N, D) contiguous copy of the population
+        self.fit    = np.array(fit, dtype=float)            if copy else fit    # (M*N,)   copy of the fitness
+        self.update(gen)
+
+
+    """ instance method """
+    # whether the snapshot is of generation "gen"
+    def isValid(self, gen):
+        return self.gen == gen
+
+    # copy (pop, fit) of generation "gen" into the preallocated buffers
+    def copyFrom(self, gen, pop, fit):
+        np.copyto(self.pop, pop)
+        np.copyto(self.fit, fit)
+        self.update(gen)
+
+    # compute ranking and the best solution of the buffers
+    def update(self, gen):
+        self.gen    = gen                                       # generation of the snapshot
+        self.rank   = np.argsort(self.fit)                      # indices sorted by fitness : good -> bad
+        self.pool   = self.rank[0:(int)(max(2.0, self.cnf.subpopulations * self.cnf.pop_size * self.cnf.p_pbest))]
+                                                                # top "p" indices for current-to-pbest/1
+        self.ib     = np.argmin(self.fit)                       # index of the best solution
+        self.b1     = self.pop[self.ib]                         # the best solution
+
+
+
+class PopulationStore:
+
+    """ constructor """
+    # initialize method : preallocated whole population, each subpopulation works on its own rows in place
+    # arrays : (pop, fit, grad) allocated by the caller (e.g. on a memory-mapped file of shared.py), None : allocated here
+    def __init__(self, cnf, fnc, arrays=None):
+
+        """ instance variable """
+        _n          = cnf.subpopulations * cnf.pop_size
+        self.cnf    = cnf
+        if arrays is None:
+            arrays  = np.zeros((_n, fnc.prob_dim)), np.full(_n, np.inf), np.zeros(_n)
+        self.pop, self.fit, self.grad = arrays                                  # (M*N, D) : P, (M*N,) : F, (M*N,) : G (FIR)
+        self.ids    = np.repeat(np.arange(cnf.subpopulations), cnf.pop_size)    # (M*N,)   : subpopulation IDs
+
+
+    """ instance method """
+    # rows of subpopulation "sid"
+    def rows(self, sid):
+        return slice(sid * self.cnf.pop_size, (sid + 1) * self.cnf.pop_size)
@@ -0,0 +1,83 @@
+###### profiler.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for timing each phase of EBADE (mutation, crossover, evaluation, validations and logging)
+# The instance is made by "makeProfiler" and named "prof" in EmulationBasedAdaptiveDifferentialEvolution class
+
+
+# import libraries and other files
+import time, threading
+
+
+# make a profiler : "NullProfiler" costs almost nothing when "cnf.do_profile" is False
+def makeProfiler(cnf):
+    if cnf.do_profile:
+        return Profiler()
+    return NullProfiler()
+
+
+class Profiler:
+
+    """ constructor """
+    # initialize method
+    def __init__(self):
+
+        """ instance variable """
+        self.gen    = 0         # generation the records belong to
+        self.rec    = {}        # {(gen, sid, phase): [seconds, calls]} : sid = -1 for the whole population
+        self.lock   = threading.Lock()  # subpopulations and losers may be profiled by threads at once ("threads")
+
+
+    """ instance method """
+    # current time to be passed to "add"
+    def clock(self):
+        return time.perf_counter()
+
+    # record a phase started at "start" (a value of "clock") : return the end time to start the next phase
+    def add(self, phase, start, sid=-1):
+        _end = time.perf_counter()
+        with self.lock:
+            _rec = self.rec.setdefault((self.gen, sid, phase), [0., 0])
+            _rec[0] += _end - start
+            _rec[1] += 1
+        return _end
+
+    # records after this belong to generation "gen"
+    def setGeneration(self, gen):
+        self.gen = gen
+
+    # total seconds and calls of each phase
+    def summary(self):
+        _ret = {}
+        for (gen, sid, phase), (sec, calls) in self.rec.items():
+            _sum = _ret.setdefault(phase, [0., 0])
+            _sum[0] += sec
+            _sum[1] += calls
+        return _ret
+
+    # output csv file : gen, sid, phase, seconds, calls
+    def outProfile(self, path):
+        with open(path, 'w') as f:
+            f.write("gen,sid,phase,time,calls\n")
+            for (gen, sid, phase), (sec, calls) in sorted(self.rec.items()):
+                f.write("{},{},{},{!r},{}\n".format(gen, sid, phase, sec, calls))
+
+
+
+class NullProfiler:
+
+    """ instance method """
+    def clock(self):
+        return 0.
+
+    def add(self, phase, start, sid=-1):
+        return 0.
+
+    def setGeneration(self, gen):
+        pass
+
+    def summary(self):
+        return {}
+
+    def outProfile(self, path):
+        pass
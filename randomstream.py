@@ -0,0 +1,48 @@
+###### randomstream.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for random streams of numpy.random.Generator with the methods of numpy.random.RandomState used in EBADE
+# The instance is made by "cnf.setRandomSeed" and "cnf.stream" (configuration.py) when "cnf.rng" is "spawn"
+
+
+# import libraries and other files
+import numpy            as np
+
+
+class RandomStream:
+
+    """ constructor """
+    # initialize method : "seq" is a numpy.random.SeedSequence
+    def __init__(self, seq):
+
+        """ instance variable """
+        self.seq    = seq
+        self.gen    = np.random.Generator(np.random.PCG64(seq))
+
+
+    """ instance method """
+    # an independent stream identified by "key" : the same key always makes the same stream,
+    # whichever order or process the streams are made in
+    def child(self, *key):
+        return RandomStream(np.random.SeedSequence(self.seq.entropy, spawn_key=self.seq.spawn_key + tuple(key)))
+
+    # uniform in [0, 1) : rand(), rand(n), rand(n, D)
+    def rand(self, *shape):
+        return self.gen.random(shape) if len(shape) > 0 else self.gen.random()
+
+    # integers in [low, high) (high=None : [0, low))
+    def randint(self, low, high=None, size=None):
+        return self.gen.integers(low, high, size)
+
+    def uniform(self, low=0., high=1., size=None):
+        return self.gen.uniform(low, high, size)
+
+    def choice(self, a, size=None, replace=True):
+        return self.gen.choice(a, size, replace)
+
+    # state for a checkpoint
+    def get_state(self):
+        return self.gen.bit_generator.state
+
+    def set_state(self, state):
+        self.gen.bit_generator.state = state
@@ -0,0 +1,124 @@
+###### runner.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for running all trials in serial or in parallel worker processes
+# The instance is made and named "rnr" in main.py
+
+
+# import libraries and other files
+import copy
+from   concurrent.futures   import ProcessPoolExecutor, as_completed
+import archive          as ar
+import ebade            as eb
+import evaluator        as ev
+import function         as fc
+import logger           as lg
+import scheduler        as sc
+
+
+# make one trial : each call has its own Configuration/Basic/Logger and random stream
+# wrap : whether "fnc" is wrapped by the evaluator and the archive (False : the trial is evaluated by the caller)
+def makeTrial(cnf, dim, prob, path_out, trial, wrap=True):
+    cnf = copy.deepcopy(cnf)
+    cnf.prob_dim, cnf.path_out = dim, path_out
+    if cnf.sim_delay > 0:
+        fnc = fc.Simulator(cnf.prob_dim, cnf.prob_name[prob], cnf.sim_delay)
+    else:
+        fnc = fc.Basic(cnf.prob_dim, cnf.prob_name[prob])
+    if wrap:
+        fnc = ev.makeEvaluator(cnf, fnc)
+    if wrap and cnf.do_archive:
+        _path = cnf.path_out + "/" + cnf.prob_name[prob] + "/archive.npz" if cnf.archive_save else None
+        fnc = ar.EvaluationArchive(fnc, cnf.archive_tol, _path)
+    log = lg.Logger(cnf, fnc, cnf.prob_name[prob])
+    fnc.resetTotalEvals()
+    cnf.setRandomSeed(trial + 1)
+    return eb.EmulationBasedAdaptiveDifferentialEvolution(cnf, fnc, log)
+
+
+# run one trial
+def runTrial(cnf, dim, prob, path_out, trial):
+    ead = makeTrial(cnf, dim, prob, path_out, trial)
+    cnf, fnc, log = ead.cnf, ead.fnc, ead.log
+    print("\t[ Problem {} ]".format(cnf.prob_name[prob]))
+    ead.run(trial)
+    if cnf.do_archive:
+        print("\tarchive =>\thits: {:06}\tevals: {:06}\thit rate: {:.3f}".format(fnc.hits, fnc.total_evals, fnc.hitRate()))
+    if hasattr(fnc, "close"):
+        fnc.close()
+    return dim, prob, trial, log.last
+
+
+class TrialRunner:
+
+    """ constructor """
+    # initialize method
+    def __init__(self, cnf):
+
+        """ instance variable """
+        self.cnf    = cnf       # configuration instance
+        self.jobs   = []        # [(dim, prob, path_out, trials) ...]   : problems and their unfinished trials
+        self.sts    = {}        # {(dim, prob): Statistics}     : statistics of each problem
+        self.rest   = {}        # {(dim, prob): the number of unfinished trials}
+
+
+    """ instance method """
+    # run all (dimension, problem, trial) combinations
+    def run(self):
+        if not self.cnf.checkEnvironment():
+            return
+        self._makeJobs()
+        if self.cnf.shared_pool:
+            self._runShared()
+        elif self.cnf.max_workers <= 1:
+            self._runSerial()
+        else:
+            self._runParallel()
+
+    # make output directories and prepare statistics of each problem
+    # trials already logged are skipped (resume after a crash)
+    def _makeJobs(self):
+        for dim in self.cnf.prob_dim_list:
+            self.cnf.prob_dim = dim
+            prob_list = self.cnf.makeOutDirectory(dim)
+            for prob in prob_list:
+                fnc = fc.Basic(self.cnf.prob_dim, self.cnf.prob_name[prob])
+                log = lg.Logger(self.cnf, fnc, self.cnf.prob_name[prob])
+                trials = [trial for trial in range(self.cnf.max_trial) if not log.hasTrial(trial + 1)]
+                self.jobs.append((dim, prob, self.cnf.path_out, trials))
+                self.sts[(dim, prob)]  = lg.Statistics(copy.deepcopy(self.cnf), fnc, log.path_out, log.path_trial)
+                self.rest[(dim, prob)] = len(trials) + 1
+                self._finish(dim, prob, None, None) # all trials may have been finished
+
+    # run trials one by one in this process
+    def _runSerial(self):
+        for dim, prob, path_out, trials in self.jobs:
+            for trial in trials:
+                self._finish(*runTrial(self.cnf, dim, prob, path_out, trial))
+
+    # run trials in worker processes : statistics of a problem is made as soon as its trials finished
+    def _runParallel(self):
+        with ProcessPoolExecutor(max_workers=self.cnf.max_workers) as pool:
+            futures = [pool.submit(runTrial, self.cnf, dim, prob, path_out, trial)
+                       for dim, prob, path_out, trials in self.jobs for trial in trials]
+            for future in as_completed(futures):
+                self._finish(*future.result())
+
+    # run all trials concurrently in this process : their evaluations share one pool of "eval_workers" workers
+    # (each trial has its own random stream, so results are the same as a serial run)
+    def _runShared(self):
+        sch = sc.Scheduler(self.cnf.eval_workers, self.cnf.evaluator == "process")
+        for dim, prob, path_out, trials in self.jobs:
+            for trial in trials:
+                sch.add((dim, prob, trial), makeTrial(self.cnf, dim, prob, path_out, trial, wrap=False), (dim, prob))
+        sch.run(lambda key, ead: self._finish(*key, ead.log.last))
+        sch.close()
+
+    # count a finished trial and make a statistics file when all trials of the problem finished
+    # (trials finished before are read from their log files)
+    def _finish(self, dim, prob, trial, last):
+        if trial is not None:
+            self.sts[(dim, prob)].addTrial(trial + 1, *last)
+        self.rest[(dim, prob)] -= 1
+        if self.rest[(dim, prob)] == 0:
+            self.sts[(dim, prob)].outStatistics()
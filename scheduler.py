@@ -0,0 +1,122 @@
+###### scheduler.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for running many EBADE instances at once whose evaluations share one bounded pool of workers
+# The instance is made and named "sch" in runner.py
+
+
+# import libraries and other files
+from   collections          import deque
+from   concurrent.futures   import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy            as np
+
+
+class Scheduler:
+
+    """ constructor """
+    # initialize method : "process" chooses worker processes instead of threads (the function must be picklable)
+    def __init__(self, workers:int=4, process:bool=False):
+
+        """ instance variable """
+        self.workers    = workers           # the number of solutions evaluated at the same time
+        self.limit      = 2 * workers       # the number of solutions in flight (queued in the pool or evaluated)
+        self.process    = process
+        self.pool       = None              # made by "run" (worker processes get the functions of all instances once)
+        self.runs       = {}                # {key: Instance}       : running instances
+        self.funcs      = {}                # {group: fnc}          : functions evaluated by the workers
+        self.ring       = deque()           # keys of instances with solutions waiting to be submitted (round robin)
+
+
+    """ instance method """
+    # add an instance "ead" driven by "ask" and "tell"
+    # instances of the same "group" (e.g. (dim, prob)) share one function in worker processes (None : its own)
+    def add(self, key, ead, group=None):
+        group = key if group is None else group
+        self.runs[key] = Instance(ead, group)
+        self.funcs.setdefault(group, ead.fnc)
+
+    # run all instances until they finish : "finish(key, ead)" is called when each instance finished
+    # the next solution submitted is taken from each instance in turn, so no instance waits for the others
+    # while an instance validates, solutions of other instances keep the workers busy
+    def run(self, finish=None):
+        if self.pool is None:
+            if self.process:                # the functions are pickled once per worker, then only (group, x) per solution
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_setFunctions, initargs=(self.funcs,))
+            else:
+                self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        for key in list(self.runs):
+            self._ask(key, finish)
+        inflight = {}                       # {future: (key, row)}
+        self._submit(inflight)
+        while len(inflight) > 0:
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key, i = inflight.pop(fut)
+                ins = self.runs[key]
+                ins.fit[i] = fut.result()
+                ins.rest -= 1
+                if ins.rest == 0:           # all solutions of the generation evaluated
+                    ins.ead.tell(ins.fit)
+                    self._ask(key, finish)
+            self._submit(inflight)
+
+    # release workers
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    # get the next solutions of an instance : removed when it finished
+    def _ask(self, key, finish):
+        ins = self.runs[key]
+        ins.x = ins.ead.ask()
+        if ins.x is None:
+            del self.runs[key]
+            if finish is not None:
+                finish(key, ins.ead)
+            return
+        ins.fit     = np.zeros(len(ins.x))
+        ins.rows    = deque(range(len(ins.x)))
+        ins.rest    = len(ins.x)
+        self.ring.append(key)
+
+    # submit solutions round robin until "limit" solutions are in flight
+    def _submit(self, inflight):
+        while len(self.ring) > 0 and len(inflight) < self.limit:
+            key = self.ring.popleft()
+            ins = self.runs[key]
+            i = ins.rows.popleft()
+            if self.process:
+                inflight[self.pool.submit(_evaluate, ins.group, ins.x[i])] = (key, i)
+            else:
+                inflight[self.pool.submit(ins.ead.fnc.evaluate, ins.x[i])] = (key, i)
+            if len(ins.rows) > 0:
+                self.ring.append(key)
+
+
+
+# functions of a worker process : {group: fnc}
+_FUNCTIONS = {}
+
+# initializer of a worker process
+def _setFunctions(funcs):
+    _FUNCTIONS.update(funcs)
+
+# evaluate a solution in a worker process
+def _evaluate(group, x):
+    return _FUNCTIONS[group].evaluate(x)
+
+
+
+class Instance:
+
+    """ constructor """
+    # initialize method : an instance and the solutions of its generation being evaluated
+    def __init__(self, ead, group):
+
+        """ instance variable """
+        self.ead    = ead           # EmulationBasedAdaptiveDifferentialEvolution instance
+        self.group  = group         # key of its function in worker processes
+        self.x      = None          # solutions of "ead.ask"
+        self.fit    = None          # their fitness
+        self.rows   = deque()       # rows of "x" not submitted yet
+        self.rest   = 0             # rows of "x" not evaluated yet
@@ -0,0 +1,178 @@
+###### shared.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for the whole population on a memory-mapped file shared with worker processes
+# Workers read the population in place and write their trial solutions and configurations to their own rows (nothing pickled)
+# Fitness is evaluated by "fnc" of the main process : ask/tell callers, evaluators (evaluator.py) and the archive (archive.py)
+# see every solution, and the FEs and archive hits are counted (and checkpointed) in one place
+# The instance is made and named "shm" in EmulationBasedAdaptiveDifferentialEvolution class when "cnf.procs" > 1
+
+
+# import libraries and other files
+import os, tempfile, weakref, threading, multiprocessing
+import numpy            as np
+from   function         import Function
+from   de               import DifferentialEvolution
+from   population       import Snapshot, PopulationStore
+
+
+# commands of a generation (ctrl[0])
+TRIALS, TUNE, STATE, STOP = 0, 1, 2, 3
+
+
+class SharedPopulation:
+
+    """ constructor """
+    # initialize method : a new file is made in /dev/shm (a temporary directory if not exist), "path" : attach to it
+    def __init__(self, cnf, fnc, path=None):
+
+        # workers continue the streams of their own subpopulations ("legacy" would copy one stream to all of them)
+        # and make trials one by one (not the batch engine or the surrogate model of the main process)
+        if cnf.rng != "spawn" or cnf.do_batch or cnf.do_batch_emul or cnf.do_prescreen:
+            raise ValueError("procs > 1 requires rng = \"spawn\", and not do_batch, do_batch_emul or do_prescreen")
+
+        """ instance variable """
+        _n, _m, _d  = cnf.subpopulations * cnf.pop_size, cnf.subpopulations, fnc.prob_dim
+        self.cnf    = cnf
+        self.fnc    = fnc
+        self.layout = [("pop", (_n, _d)), ("fit", (_n,)), ("grad", (_n,)),     # P, F, G : PopulationStore
+                       ("u", (_n, _d)),                                         # trial solutions  (rows of each subpopulation)
+                       ("var", (_m, 4)),                                        # configurations   [F CR mut xov] of each subpopulation
+                       ("loser", (_m,)), ("target", (_m, _d)),                  # losers to be tuned toward their "target" rows
+                       ("ctrl", (3,))]                                          # [command, generation, K]
+        _size       = 8 * sum(int(np.prod(shape)) for name, shape in self.layout)
+        self.owner  = path is None          # whether this process made (and removes) the file
+        if self.owner:
+            _fd, path = tempfile.mkstemp(prefix="ebade_", suffix=".shm", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+            os.ftruncate(_fd, _size)
+            os.close(_fd)
+        self.path   = path
+        self.remove = weakref.finalize(self, _unlink, path) if self.owner else None     # remove the file once (at the latest, at exit)
+        _buf        = np.memmap(self.path, dtype=np.uint8, mode="r+", shape=(_size,))
+        _off        = 0
+        for name, shape in self.layout:     # views of the file
+            _len = 8 * int(np.prod(shape))
+            setattr(self, name, _buf[_off:_off + _len].view(np.float64).reshape(shape))
+            _off += _len
+        if self.owner:
+            self.fit[:] = np.inf
+        self.sto    = PopulationStore(cnf, fnc, (self.pop, self.fit, self.grad))
+        self.procs  = []                    # worker processes
+        self.barrier= None                  # all workers and this process meet twice a command (before and after it)
+        self.queue  = None                  # random states of the subpopulations sent by workers (checkpoint)
+
+
+    """ instance method """
+    # start "cnf.procs" workers : each takes the subpopulations of a contiguous block and continues their random streams
+    # the file is removed as soon as all workers mapped it, so it is not left even if the trial crashes
+    # workers only clip trials to the domain : they get a bare Function of it (not the evaluators or the archive
+    # wrapping "fnc", which may hold thread pools and caches that cannot be pickled for spawn/forkserver)
+    def start(self, alg):
+        _ctx        = multiprocessing.get_context()
+        _fnc        = Function(self.fnc.prob_dim, self.fnc.prob_name)
+        _fnc.axis_range = self.fnc.axis_range
+        self.barrier= _ctx.Barrier(self.cnf.procs + 1)
+        self.queue  = _ctx.Queue()
+        for sids in np.array_split(np.arange(self.cnf.subpopulations), self.cnf.procs):
+            _p = _ctx.Process(target=work, args=(self.cnf, _fnc, self.path, [int(i) for i in sids],
+                                                 [alg[i].rd.get_state() for i in sids], self.barrier, self.queue), daemon=True)
+            _p.start()
+            self.procs.append(_p)
+        self.barrier.wait()                 # all workers mapped the file
+        self.remove()
+
+    # trial solutions of all subpopulations of generation "gen" with the configurations of "alg"
+    def makeAllTrials(self, alg, gen):
+        self.var[:] = [[a.F, a.CR, a.v_MUTATION, a.v_CROSSOVER] for a in alg]
+        self._command(TRIALS, gen)
+        return np.array(self.u)
+
+    # configurations of "loser" tuned toward "target" (one row per loser) with "analyte" emulations each
+    def tune(self, loser, target, gen, analyte):
+        self.loser[:] = 0
+        self.loser[loser] = 1
+        self.target[loser] = target
+        self._command(TUNE, gen, analyte)
+        return [[self.var[i, 0], self.var[i, 1], int(self.var[i, 2]), int(self.var[i, 3])] for i in loser]
+
+    # random states of all subpopulations, which are kept by the workers
+    def getStates(self):
+        self._command(STATE)
+        _ret = [None] * self.cnf.subpopulations
+        for i in range(self.cnf.subpopulations):
+            sid, state = self.queue.get()
+            _ret[sid] = state
+        return _ret
+
+    # stop the workers and remove the file (if not yet) : workers are terminated if they cannot be stopped
+    # by a command in "timeout" seconds (a worker failed, was killed, or a command was interrupted)
+    def close(self, timeout=5.):
+        if len(self.procs) > 0:
+            _stop = all(_p.is_alive() for _p in self.procs)     # a killed worker can leave the barrier waiting forever
+            if _stop:
+                try:
+                    self.ctrl[:] = STOP, 0, 0
+                    self.barrier.wait(timeout)
+                    self.barrier.wait(timeout)
+                except threading.BrokenBarrierError:
+                    _stop = False
+            for _p in self.procs:
+                if _stop:
+                    _p.join(timeout)
+                if _p.is_alive():
+                    _p.terminate()
+                _p.join()
+            self.procs = []
+        if self.remove is not None:
+            self.remove()
+
+    # run a command on all workers : the first "wait" releases them, the second waits until all finished
+    def _command(self, cmd, gen=0, analyte=0):
+        self.ctrl[:] = cmd, gen, analyte
+        self.barrier.wait()
+        self.barrier.wait()
+
+
+# remove the file of a SharedPopulation : the mapping is released when its views are
+def _unlink(path):
+    try:
+        os.remove(path)
+    except OSError:                         # already removed
+        pass
+
+
+# a worker process : evolve and tune the subpopulations "sids" whose random streams continue from "states"
+def work(cnf, fnc, path, sids, states, barrier, queue):
+    try:
+        shm = SharedPopulation(cnf, fnc, path)
+        alg = {}
+        for i, sid in enumerate(sids):
+            alg[sid] = DifferentialEvolution(cnf, fnc, cnf.init_variants, sid, shm.sto, None, cnf.stream(0, sid))
+            alg[sid].rd.set_state(states[i])
+        snp = Snapshot(cnf, 0, shm.pop, shm.fit, copy=False)   # the population does not change during a command
+        barrier.wait()                      # mapped
+        while True:
+            barrier.wait()
+            cmd, gen = int(shm.ctrl[0]), int(shm.ctrl[1])
+            if cmd == STOP:
+                barrier.wait()
+                return
+            if cmd == TRIALS:
+                snp.update(gen)
+                for sid in sids:
+                    alg[sid].setVariants([shm.var[sid, 0], shm.var[sid, 1], int(shm.var[sid, 2]), int(shm.var[sid, 3])])
+                    shm.u[shm.sto.rows(sid)] = alg[sid].makeTrials(snp)
+            elif cmd == TUNE:
+                snp.update(gen)
+                for sid in sids:
+                    if shm.loser[sid] > 0:
+                        shm.var[sid] = alg[sid].emulate(shm.target[sid], snp, int(shm.ctrl[2]), cnf.stream(1, gen, sid))
+            elif cmd == STATE:
+                for sid in sids:
+                    queue.put((sid, alg[sid].rd.get_state()))
+            barrier.wait()
+    except threading.BrokenBarrierError:   # stopped by the main process
+        return
+    except BaseException:
+        barrier.abort()                     # the main process raises BrokenBarrierError instead of waiting forever
+        raise
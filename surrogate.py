@@ -0,0 +1,100 @@
+###### surrogate.py #####
+#                                           Last Update:  2026/10/18
+#
+# File for surrogate models pre-screening trial solutions before the real fitness evaluation
+# The instance is made by "makeSurrogate" and named "sur" in EmulationBasedAdaptiveDifferentialEvolution class
+
+
+# import libraries and other files
+import threading
+import numpy            as np
+
+
+# make a surrogate model chosen by "cnf.prescreen_model"
+def makeSurrogate(cnf, fnc):
+    if cnf.prescreen_model == "knn":
+        return KNNSurrogate(cnf, fnc)
+    elif cnf.prescreen_model == "rbf":
+        return RBFSurrogate(cnf, fnc)
+    else:
+        print("Error: Do not exist surrogate model {} (surrogate.py)".format(cnf.prescreen_model))
+        return None
+
+
+class Surrogate:
+
+    """ constructor """
+    # initialize method
+    def __init__(self, cnf, fnc):
+
+        """ instance variable """
+        self.cnf    = cnf
+        self.x      = np.zeros((cnf.prescreen_archive, fnc.prob_dim))  # archive of evaluated solutions (ring buffer)
+        self.y      = np.zeros(cnf.prescreen_archive)                   # their fitness
+        self.size   = 0         # the number of archived solutions
+        self.head   = 0         # where the next solution is archived
+        self.saved  = 0         # the number of trial candidates not evaluated (screened out)
+        self.lock   = threading.Lock()  # subpopulations may be screened by threads at once ("threads")
+
+
+    """ instance method """
+    # archive evaluated solutions : the oldest are overwritten when the archive is full
+    def add(self, x, y):
+        _idx = (self.head + np.arange(len(x))) % len(self.x)
+        self.x[_idx], self.y[_idx] = x, y
+        self.head = (self.head + len(x)) % len(self.x)
+        self.size = min(self.size + len(x), len(self.x))
+        self._train()
+
+    # whether the model has enough archived solutions to predict
+    def isReady(self):
+        return self.size >= self.cnf.prescreen_min
+
+    # choose the best-predicted candidate of each solution : cand is (candidates, n, D), return (n, D)
+    def screen(self, cand):
+        _c, _n = cand.shape[0], cand.shape[1]
+        _prd = self.predict(cand.reshape(_c * _n, -1)).reshape(_c, _n)
+        with self.lock:
+            self.saved += (_c - 1) * _n
+        return cand[np.argmin(_prd, axis=0), np.arange(_n)]
+
+    # train the model with the archive : overridden by each model
+    def _train(self):
+        pass
+
+    # predict the fitness of rows of "x" : overridden by each model
+    def predict(self, x):
+        return np.zeros(len(x))
+
+
+
+class KNNSurrogate(Surrogate):
+
+    """ instance method """
+    # inverse distance weighted average of the k-nearest archived solutions
+    def predict(self, x):
+        _ax, _ay = self.x[:self.size], self.y[:self.size]
+        _k = min(self.cnf.prescreen_neighbors, self.size)
+        _d = np.sum(x * x, axis=1)[:, None] + np.sum(_ax * _ax, axis=1)[None, :] - 2 * x @ _ax.T
+        _d = np.sqrt(np.maximum(_d, 0.))
+        _nn = np.argpartition(_d, _k - 1, axis=1)[:, :_k]       # indices of the k-nearest
+        _dn = np.take_along_axis(_d, _nn, axis=1)
+        _w = 1. / np.maximum(_dn, 1e-12)                        # an archived solution itself dominates
+        return np.sum(_w * _ay[_nn], axis=1) / np.sum(_w, axis=1)
+
+
+
+class RBFSurrogate(Surrogate):
+
+    """ instance method """
+    # cubic radial basis function with a linear tail over the archive
+    def _train(self):
+        from scipy.interpolate import RBFInterpolator      # scipy is imported only when this model is used
+        self.model = None
+        if self.isReady():
+            _ax, _ay = self.x[:self.size], self.y[:self.size]
+            _, _idx = np.unique(_ax, axis=0, return_index=True)     # duplicates make the system singular
+            self.model = RBFInterpolator(_ax[_idx], _ay[_idx], kernel="cubic", smoothing=1e-8)
+
+    def predict(self, x):
+        return self.model(x)